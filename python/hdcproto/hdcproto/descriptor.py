@@ -3,18 +3,31 @@ from __future__ import annotations
 import enum
 import json
 import logging
+import operator
+import types
 import typing
 
 import semver
 
+try:
+    import orjson  # Optional dependency, which merely speeds up the serialization of the IDL-JSON
+except ImportError:
+    orjson = None
+
 from hdcproto.exception import HdcCmdException, HdcCmdExc_UnknownProperty, HdcCmdExc_ReadOnlyProperty
 from hdcproto.parse import is_variable_size_dtype
-from hdcproto.spec import (CmdID, EvtID, PropID, DTypeID)
+from hdcproto.spec import (CmdID, EvtID, PropID, ExcID, DTypeID)
 from hdcproto.validate import (validate_uint8, validate_mandatory_name, validate_optional_name, validate_dtype,
                                validate_optional_version, validate_optional_doc)
 
 logger = logging.getLogger(__name__)  # Logger-name: "hdcproto.descriptor"
 
+_BY_EXCEPTION_ID = operator.attrgetter("exception_id")
+_TO_IDL_DICT = operator.methodcaller("to_idl_dict")
+
+# Fallback for when orjson is not available. Produces the same compact output as orjson does.
+_IDL_JSON_ENCODER = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False)
+
 
 def prune_none_values(d: typing.MutableMapping[str, typing.Any]) -> None:
     """Removes elements with a None value"""
@@ -23,12 +36,27 @@ def prune_none_values(d: typing.MutableMapping[str, typing.Any]) -> None:
         del (d[k])
 
 
+def register_by_id(registry: typing.MutableMapping[int, typing.Any], descriptor: typing.Any) -> None:
+    """
+    Adds (or replaces) the descriptor in the given registry, while keeping the registry ordered by ID.
+    Thus, the IDL can be generated by iterating the registry, without having to sort it every time.
+    """
+    is_out_of_order = descriptor.id not in registry and any(key > descriptor.id for key in registry)
+    registry[descriptor.id] = descriptor
+    if is_out_of_order:
+        items = sorted(registry.items())
+        registry.clear()
+        registry.update(items)
+
+
 class ArgD:
     """
     Argument descriptor
 
     As used to describe the arguments that an HDC-Command takes or that an HDC-Event carries.
     """
+    __slots__ = ("dtype", "name", "doc")
+
     dtype: DTypeID
     name: str
     doc: str | None
@@ -69,6 +97,8 @@ class RetD:
 
     Describes the value(s) that an HDC-Command returns.
     """
+    __slots__ = ("dtype", "name", "doc")
+
     dtype: DTypeID
     name: str | None
     doc: str | None
@@ -104,6 +134,8 @@ class RetD:
 
 
 class StateDescriptor:
+    __slots__ = ("id", "name", "doc")
+
     id: int
     name: str
     doc: str | None
@@ -140,12 +172,15 @@ class StateDescriptor:
 
 
 class CommandDescriptor:
+    __slots__ = ("id", "name", "args", "returns", "_raises", "doc", "_idl_dict")
+
     id: int
     name: str
     args: tuple[ArgD, ...]  # ToDo: Attribute optionality. #25
     returns: tuple[RetD, ...]  # ToDo: Attribute optionality. #25
-    raises: dict[int, HdcCmdException]  # Not optional, because of mandatory exceptions
+    _raises: dict[int, HdcCmdException]  # Not optional, because of mandatory exceptions
     doc: str | None
+    _idl_dict: dict | None  # Memoized result of to_idl_dict()
 
     # noinspection PyShadowingBuiltins
     def __init__(self,
@@ -155,6 +190,7 @@ class CommandDescriptor:
                  returns: RetD | typing.Iterable[RetD] | None,
                  raises: typing.Iterable[HdcCmdException | enum.IntEnum] | None,
                  doc: str | None = None):
+        self._idl_dict = None
         self.id = validate_uint8(id)
         self.name = validate_mandatory_name(name)
 
@@ -190,11 +226,11 @@ class CommandDescriptor:
 
         if raises is None:
             raises = []
-        self.raises = dict()
+        self._raises = dict()
         for exc in raises:
             if isinstance(exc, enum.IntEnum):
                 exc = HdcCmdException(exc)
-            self._register_exception(exc)
+            self.register_exception(exc)
         # Strictly speaking all Commands also bear the potential to raise:
         #    HdcCmdExc_CommandFailed
         #    HdcCmdExc_UnknownFeature
@@ -204,16 +240,40 @@ class CommandDescriptor:
 
         self.doc = doc
 
-    def _register_exception(self, exception: HdcCmdException) -> None:
-        if exception.exception_id in self.raises:
+    @property
+    def raises(self) -> typing.Mapping[int, HdcCmdException]:
+        """
+        Read-only view, because any change must discard the memoized result of to_idl_dict(), thus must either
+        go through register_exception() or assign a whole new dictionary.
+        """
+        return types.MappingProxyType(self._raises)
+
+    @raises.setter
+    def raises(self, exceptions: typing.Mapping[int, HdcCmdException]) -> None:
+        self._raises = dict(exceptions)
+        self._idl_dict = None
+
+    def register_exception(self, exception: HdcCmdException) -> None:
+        """
+        Note how a device must register exceptions via CommandService.register_exception() instead, once its
+        IDL-JSON may have been served, because the device caches the serialized IDL-JSON.
+        """
+        if exception.exception_id in self._raises:
             raise ValueError(f'Already registered Exception.id=0x{exception.exception_id:02X} '
-                             f'as "{self.raises[exception.exception_id]}"')
-        self.raises[exception.exception_id] = exception
+                             f'as "{self._raises[exception.exception_id]}"')
+        self._raises[exception.exception_id] = exception
+        self._idl_dict = None
 
     def __str__(self):
         return f"Command_0x{self.id:02X}_{self.name}"
 
     def to_idl_dict(self) -> dict:
+        """
+        The result is memoized, because descriptors are not expected to change once they've been registered.
+        Callers must therefore not modify the returned dictionary.
+        """
+        if self._idl_dict is not None:
+            return self._idl_dict
         result = dict(
             id=self.id,
             name=self.name,
@@ -225,10 +285,11 @@ class CommandDescriptor:
                      for ret in self.returns
                      ] if self.returns is not None else None,
             raises=[exc.to_idl_dict()
-                    for exc in sorted(self.raises.values(), key=lambda d: d.exception_id)
-                    ] if self.raises is not None else None
+                    for exc in sorted(self._raises.values(), key=_BY_EXCEPTION_ID)
+                    ]
         )
         prune_none_values(result)
+        self._idl_dict = result
         return result
 
     @classmethod
@@ -251,6 +312,8 @@ class CommandDescriptor:
 
 
 class GetPropertyValueCommandDescriptor(CommandDescriptor):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(
             id=CmdID.GET_PROP_VALUE,
@@ -264,6 +327,8 @@ class GetPropertyValueCommandDescriptor(CommandDescriptor):
 
 
 class SetPropertyValueCommandDescriptor(CommandDescriptor):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(
             id=CmdID.SET_PROP_VALUE,
@@ -279,10 +344,13 @@ class SetPropertyValueCommandDescriptor(CommandDescriptor):
 
 
 class EventDescriptor:
+    __slots__ = ("id", "name", "args", "doc", "_idl_dict")
+
     id: int
     name: str
     args: tuple[ArgD, ...] | None
     doc: str
+    _idl_dict: dict | None  # Memoized result of to_idl_dict()
 
     # noinspection PyShadowingBuiltins
     def __init__(self,
@@ -290,6 +358,7 @@ class EventDescriptor:
                  name: str,
                  args: typing.Iterable[ArgD] | None,
                  doc: str | None):
+        self._idl_dict = None
         self.id = validate_uint8(id)
         self.name = validate_mandatory_name(name)
 
@@ -308,6 +377,9 @@ class EventDescriptor:
         return f"Event_0x{self.id:02X}_{self.name}"
 
     def to_idl_dict(self) -> dict:
+        """Memoized. Same caveats as in CommandDescriptor.to_idl_dict()"""
+        if self._idl_dict is not None:
+            return self._idl_dict
         result = dict(
             id=self.id,
             name=self.name,
@@ -316,6 +388,7 @@ class EventDescriptor:
                   for arg in self.args] if self.args is not None else None,
         )
         prune_none_values(result)
+        self._idl_dict = result
         return result
 
     @classmethod
@@ -334,6 +407,8 @@ class EventDescriptor:
 
 
 class LogEventDescriptor(EventDescriptor):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(id=EvtID.LOG,
                          name="log",
@@ -343,6 +418,8 @@ class LogEventDescriptor(EventDescriptor):
 
 
 class FeatureStateTransitionEventDescriptor(EventDescriptor):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(id=EvtID.FEATURE_STATE_TRANSITION,
                          name="feature_state_transition",
@@ -353,11 +430,14 @@ class FeatureStateTransitionEventDescriptor(EventDescriptor):
 
 
 class PropertyDescriptor:
+    __slots__ = ("id", "name", "dtype", "is_readonly", "doc", "_idl_dict")
+
     id: int
     name: str
     dtype: DTypeID
     is_readonly: bool
     doc: str | None
+    _idl_dict: dict | None  # Memoized result of to_idl_dict()
 
     # noinspection PyShadowingBuiltins
     def __init__(self,
@@ -366,6 +446,7 @@ class PropertyDescriptor:
                  dtype: DTypeID | str | int,
                  is_readonly: bool,
                  doc: str | None = None):
+        self._idl_dict = None
         self.id = validate_uint8(id)
         self.name = validate_mandatory_name(name)
         self.dtype = validate_dtype(dtype)
@@ -376,6 +457,9 @@ class PropertyDescriptor:
         return f"Property_0x{self.id:02X}_{self.name}"
 
     def to_idl_dict(self) -> dict:
+        """Memoized. Same caveats as in CommandDescriptor.to_idl_dict()"""
+        if self._idl_dict is not None:
+            return self._idl_dict
         result = dict(
             id=self.id,
             name=self.name,
@@ -385,6 +469,7 @@ class PropertyDescriptor:
             doc=self.doc
         )
         prune_none_values(result)
+        self._idl_dict = result
         return result
 
     @classmethod
@@ -403,6 +488,8 @@ class PropertyDescriptor:
 
 
 class LogEventThresholdPropertyDescriptor(PropertyDescriptor):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(
             id=PropID.LOG_EVT_THRESHOLD,
@@ -414,6 +501,8 @@ class LogEventThresholdPropertyDescriptor(PropertyDescriptor):
 
 
 class FeatureStatePropertyDescriptor(PropertyDescriptor):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(
             id=PropID.FEAT_STATE,
@@ -425,10 +514,14 @@ class FeatureStatePropertyDescriptor(PropertyDescriptor):
 
 
 class FeatureDescriptor:
+    __slots__ = ("id", "name", "class_name", "_class_version", "_class_version_str", "doc",
+                 "states", "commands", "events", "properties")
+
     id: int
     name: str
     class_name: str
-    class_version: str | semver.VersionInfo | None
+    _class_version: semver.VersionInfo | None
+    _class_version_str: str | None  # Cached, because str(VersionInfo) is rather costly
     doc: str | None
     states: dict[int, StateDescriptor] | None
     commands: dict[int, CommandDescriptor]
@@ -450,7 +543,7 @@ class FeatureDescriptor:
         self.id = validate_uint8(id)
         self.name = validate_mandatory_name(name)
         self.class_name = validate_mandatory_name(cls)
-        self.class_version = validate_optional_version(version)
+        self.class_version = version  # Validated by the setter
 
         if doc is None:
             doc = ""
@@ -465,7 +558,7 @@ class FeatureDescriptor:
                     d = StateDescriptor(id=d, name=d.name)
                 if d.id in self.states.keys():
                     ValueError("states contains duplicate ID values")
-                self.states[d.id] = d
+                register_by_id(self.states, d)
 
         # Commands
         self.commands = dict()
@@ -474,7 +567,7 @@ class FeatureDescriptor:
         for d in commands:
             if d.id in self.commands.keys():
                 ValueError("commands contains duplicate ID values")
-            self.commands[d.id] = d
+            register_by_id(self.commands, d)
 
         # Events
         self.events = dict()
@@ -483,7 +576,7 @@ class FeatureDescriptor:
         for d in events:
             if d.id in self.events.keys():
                 ValueError("events contains duplicate ID values")
-            self.events[d.id] = d
+            register_by_id(self.events, d)
 
         # Properties
         self.properties = dict()
@@ -492,36 +585,37 @@ class FeatureDescriptor:
         for d in properties:
             if d.id in self.properties.keys():
                 ValueError("properties contains duplicate ID values")
-            self.properties[d.id] = d
+            register_by_id(self.properties, d)
+
+    @property
+    def class_version(self) -> semver.VersionInfo | None:
+        return self._class_version
+
+    @class_version.setter
+    def class_version(self, version: str | semver.VersionInfo | None) -> None:
+        self._class_version = validate_optional_version(version)
+        self._class_version_str = str(self._class_version) if self._class_version is not None else None
 
     def __str__(self):
         return f"Feature_0x{self.id:02X}_{self.name}"
 
     def to_idl_dict(self) -> dict:
+        # Only inserting optional items if they are not None, instead of pruning them afterwards
         result = dict(
             id=self.id,
             name=self.name,
-            cls=self.class_name,
-            version=str(self.class_version) if self.class_version is not None else None,
-            doc=self.doc,
-            states=[
-                d.to_idl_dict()
-                for d in sorted(self.states.values(), key=lambda d: d.id)
-            ] if self.states is not None else None,
-            commands=[
-                d.to_idl_dict()
-                for d in sorted(self.commands.values(), key=lambda d: d.id)
-            ],
-            events=[
-                d.to_idl_dict()
-                for d in sorted(self.events.values(), key=lambda d: d.id)
-            ],
-            properties=[
-                d.to_idl_dict()
-                for d in sorted(self.properties.values(), key=lambda d: d.id)
-            ]
+            cls=self.class_name
         )
-        prune_none_values(result)
+        if self._class_version_str is not None:
+            result['version'] = self._class_version_str
+        if self.doc is not None:
+            result['doc'] = self.doc
+        if self.states is not None:
+            result['states'] = list(map(_TO_IDL_DICT, self.states.values()))
+        # No need to sort, because register_by_id() keeps them ordered by ID
+        result['commands'] = list(map(_TO_IDL_DICT, self.commands.values()))
+        result['events'] = list(map(_TO_IDL_DICT, self.events.values()))
+        result['properties'] = list(map(_TO_IDL_DICT, self.properties.values()))
         return result
 
     @classmethod
@@ -548,6 +642,8 @@ class FeatureDescriptor:
 
 
 class TunnelDescriptor:
+    __slots__ = ("id", "name", "protocol", "doc")
+
     id: int
     name: str
     protocol: str
@@ -589,6 +685,8 @@ class TunnelDescriptor:
 
 
 class DeviceDescriptor:
+    __slots__ = ("version", "max_req", "features", "tunnels")
+
     version: str
     max_req: int
     features: dict[int, FeatureDescriptor]
@@ -608,27 +706,26 @@ class DeviceDescriptor:
             for d in features:
                 if d.id in self.features.keys():
                     ValueError("features contains duplicate ID values")
-                self.features[d.id] = d
+                register_by_id(self.features, d)
 
         self.tunnels = dict()
         if tunnels is not None:
             for d in tunnels:
                 if d.id in self.tunnels.keys():
                     ValueError("tunnels contains duplicate ID values")
-                self.tunnels[d.id] = d
+                register_by_id(self.tunnels, d)
 
     def to_idl_dict(self) -> dict:
+        # Only inserting optional items if they are not empty, instead of pruning them afterwards
         result = dict(
             version=self.version,
-            max_req=self.max_req,
-            features=[d.to_idl_dict()
-                      for d in sorted(self.features.values(), key=lambda d: d.id)
-                      ] if len(self.features) > 0 else None,
-            tunnels=[d.to_idl_dict()
-                     for d in sorted(self.tunnels.values(), key=lambda d: d.id)
-                     ] if len(self.tunnels) > 0 else None
+            max_req=self.max_req
         )
-        prune_none_values(result)
+        # No need to sort, because register_by_id() keeps them ordered by ID
+        if self.features:
+            result['features'] = list(map(_TO_IDL_DICT, self.features.values()))
+        if self.tunnels:
+            result['tunnels'] = list(map(_TO_IDL_DICT, self.tunnels.values()))
         return result
 
     @classmethod
@@ -649,8 +746,14 @@ class DeviceDescriptor:
         return cls(**kwargs)
 
     def to_idl_json(self) -> str:
+        return self.to_idl_json_bytes().decode(encoding="utf-8")
+
+    def to_idl_json_bytes(self) -> bytes:
+        """Same as to_idl_json(), but already UTF-8 encoded, as required for the Meta.IdlJson reply message."""
         idl_dict = self.to_idl_dict()
-        return json.dumps(idl_dict)
+        if orjson is not None:
+            return orjson.dumps(idl_dict)  # Already UTF-8 encoded
+        return _IDL_JSON_ENCODER.encode(idl_dict).encode(encoding="utf-8", errors="strict")
 
     @classmethod
     def from_idl_json(cls, idl_json) -> DeviceDescriptor:
@@ -24,7 +24,7 @@ class MessageRouter:
         - Routing of event-messages received from the device
     """
     transport: TransportBase | None
-    idl_json_generator: typing.Callable[[], str] | None
+    idl_json_generator: typing.Callable[[], bytes | str] | None
     max_req_msg_size: int
     pending_request_message: bytes | None
     command_request_handlers: dict[typing.Tuple[int, int], typing.Callable[[bytes], None]]
@@ -32,7 +32,7 @@ class MessageRouter:
 
     def __init__(self,
                  transport: TransportBase | str | None = None,
-                 idl_json_generator: typing.Callable[[], str] | None = None,
+                 idl_json_generator: typing.Callable[[], bytes | str] | None = None,
                  max_req: int = 2048):
         if isinstance(transport, str):
             transport = TransportBase.transport_factory(transport_url=transport, is_server=True)
@@ -136,7 +136,7 @@ class MessageRouter:
             # Raise an exception, because Device implementation is to blame for this
             raise RuntimeError("Mustn't send a reply if no request is pending to be replied to")
 
-        logger.info(f"Sending reply message")
+        logger.info("Sending reply message")
         self.pending_request_message = None
         self.transport.send_message(reply_message)
 
@@ -201,12 +201,11 @@ class MessageRouter:
         assert request_message[0] == MessageTypeID.META
         assert request_message[1] == MetaID.IDL_JSON
         logger.info("Replying to a Meta.IDL_JSON request message.")
-        reply_message = bytearray()
-        reply_message.append(MessageTypeID.META)
-        reply_message.append(MetaID.IDL_JSON)
-        idl_json = "" if self.idl_json_generator is None else self.idl_json_generator()
-        reply_message.extend(idl_json.encode(encoding="utf-8", errors="strict"))
-        reply_message = bytes(reply_message)
+        idl_json = b"" if self.idl_json_generator is None else self.idl_json_generator()
+        if isinstance(idl_json, str):  # Generators used to return a str, which is still supported
+            idl_json = idl_json.encode(encoding="utf-8", errors="strict")
+        # Concatenating copies the (rather large) IDL-JSON just once, instead of extending and then freezing a bytearray
+        reply_message = bytes([MessageTypeID.META, MetaID.IDL_JSON]) + idl_json
         self.send_reply_for_pending_request(reply_message)
 
     def _handle_meta_request(self, request_message: bytes) -> None:
@@ -234,13 +233,13 @@ class MessageRouter:
         assert request_message[0] == MessageTypeID.COMMAND
         feature_id = request_message[1]
         command_id = request_message[2]
-        key = (feature_id, command_id)
-        if key in self.command_request_handlers:
+        command_request_handler = self.command_request_handlers.get((feature_id, command_id))
+        if command_request_handler is not None:
             # Note how it's up to each individual handler to either reply straight away from within
             # this SerialTransport.receiver_thread context, or to delay its reply into another context.
             logger.info("Routing COMMAND request message to its handler.")
             try:
-                return self.command_request_handlers[key](request_message)
+                return command_request_handler(request_message)
             except HdcCmdException as e:  # Translate it into a command-error-reply
                 cmd_reply_message = bytes([MessageTypeID.COMMAND, feature_id, command_id, e.exception_id])
                 if e.exception_message:
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 import enum
+import itertools
 import logging
+import struct
+import threading
 import typing
-import uuid
+import weakref
 
 import semver
 
@@ -13,24 +16,54 @@ import hdcproto.transport.serialport
 from hdcproto.descriptor import StateDescriptor, PropertyDescriptor, CommandDescriptor, \
     GetPropertyValueCommandDescriptor, SetPropertyValueCommandDescriptor, EventDescriptor, LogEventDescriptor, \
     FeatureStateTransitionEventDescriptor, FeatureDescriptor, LogEventThresholdPropertyDescriptor, \
-    FeatureStatePropertyDescriptor, DeviceDescriptor, TunnelDescriptor
+    FeatureStatePropertyDescriptor, DeviceDescriptor, TunnelDescriptor, register_by_id
 from hdcproto.exception import HdcDataTypeError, HdcCmdException, HdcCmdExc_CommandFailed, HdcCmdExc_InvalidArgs, \
     HdcCmdExc_UnknownProperty
-from hdcproto.parse import value_to_bytes, bytes_to_value, parse_command_request_payload
+from hdcproto.parse import value_to_bytes, bytes_to_value, parse_command_request_payload, dtypes_struct, \
+    is_variable_size_dtype, is_suitable_value
 from hdcproto.spec import (ExcID, MessageTypeID, FeatureID, DTypeID, HDC_VERSION)
 from hdcproto.transport.base import TransportBase
 from hdcproto.transport.tunnel import TunnelTransport
-from hdcproto.validate import validate_uint8, validate_optional_version, validate_mandatory_name, validate_custom_id
+from hdcproto.validate import validate_optional_version, validate_mandatory_name, validate_custom_id, validate_uint8
 
 logger = logging.getLogger(__name__)  # Logger-name: "hdcproto.device.service"
 
+# Suffixes for the names of the loggers, whose logs each feature-instance forwards as HDC Log-events to the host
+_hdc_logger_ids = itertools.count()
+
+# Names of the only values that LogEventThreshold can take, as constrained by its setter
+_LOG_LEVEL_NAMES = {level: logging.getLevelName(level)
+                    for level in (logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR, logging.CRITICAL)}
+
 
 class CommandService:
+    __slots__ = ("logger", "command_descriptor", "feature_service", "router", "command_implementation", "msg_prefix",
+                 "_arg_dtypes", "_args_struct", "_args_tail_dtype", "_return_dtypes", "_reply_prefix", "_reply_struct",
+                 "_reply_tail_dtype")
+
     command_descriptor: CommandDescriptor
     feature_service: FeatureService
+    router: hdcproto.device.router.MessageRouter
     command_implementation: typing.Callable[[typing.Any], typing.Any]
     _command_request_handler: typing.Callable[[bytes], None]
     msg_prefix: bytes
+    _arg_dtypes: tuple[DTypeID, ...]
+    _args_struct: struct.Struct | None
+    _args_tail_dtype: DTypeID | None
+    _return_dtypes: tuple[DTypeID, ...]
+    _reply_prefix: bytes
+    _reply_struct: struct.Struct | None
+    _reply_tail_dtype: DTypeID | None
+
+    # Subclasses that always service the same command may declare its descriptor here. It will be validated
+    # once, when the subclass is defined, and then be shared by all instances of that subclass, i.e. by every feature.
+    # Beware that this includes its mutable raises dictionary: Exceptions registered on it apply to all features.
+    COMMAND_DESCRIPTOR: typing.ClassVar[CommandDescriptor | None] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.COMMAND_DESCRIPTOR is not None and not isinstance(cls.COMMAND_DESCRIPTOR, CommandDescriptor):
+            raise TypeError(f"{cls.__name__}.COMMAND_DESCRIPTOR must be a CommandDescriptor")
 
     def __init__(self,
                  command_descriptor: CommandDescriptor,
@@ -41,13 +74,16 @@ class CommandService:
         # Logger-name like: "hdcproto.device.service.MyDeviceService.MyFeatureService.MyCommandService"
         self.logger = feature_service.logger.getChild(self.__class__.__name__)
 
-        if not isinstance(command_descriptor, CommandDescriptor):
-            raise TypeError
+        # Trusting the descriptor declared by a subclass, because __init_subclass__ already validated it
+        if command_descriptor is None or command_descriptor is not self.COMMAND_DESCRIPTOR:
+            if not isinstance(command_descriptor, CommandDescriptor):
+                raise TypeError
         self.command_descriptor = command_descriptor
 
-        self.logger.debug(f"Initializing instance of {self.__class__.__name__} "
-                          f"to service {command_descriptor} "
-                          f"on {feature_service.feature_descriptor}")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Initializing instance of {self.__class__.__name__} "
+                              f"to service {command_descriptor} "
+                              f"on {feature_service.feature_descriptor}")
 
         # Reference from feature --> command
         if command_descriptor.id in feature_service.command_services:
@@ -57,12 +93,14 @@ class CommandService:
         feature_service.command_services[command_descriptor.id] = self
 
         self.feature_service = feature_service  # Reference from command --> feature
+        self.router = feature_service.router  # Shortcut for the hot path. The router of a device is never replaced.
 
         # Ensure the descriptor of the feature includes this command's descriptor
-        self.feature_service.feature_descriptor.commands[command_descriptor.id] = command_descriptor
+        register_by_id(self.feature_service.feature_descriptor.commands, command_descriptor)
+        feature_service.device_service.invalidate_idl_cache()
 
         # Let message router know that this Service will handle requests addressed at this FeatureID & CommandID
-        feature_service.router.register_command_request_handler(
+        self.router.register_command_request_handler(
             feature_id=feature_service.feature_descriptor.id,
             command_id=command_descriptor.id,
             command_request_handler=self._command_request_handler)
@@ -74,26 +112,86 @@ class CommandService:
                                  self.feature_service.feature_descriptor.id,
                                  self.command_descriptor.id])
 
-    @property
-    def router(self) -> hdcproto.device.router.MessageRouter:
-        return self.feature_service.device_service.router
+        # Fixed-size arguments and return values can be (de-)serialized all at once with a pre-compiled struct.
+        # Not for DTYPE arguments, though, because struct would not convert them into DTypeID values.
+        self._arg_dtypes = tuple(arg.dtype for arg in command_descriptor.args)
+        # A variable-size argument, e.g. the new value of SetPropertyValue, can only be the last one and will simply
+        # be decoded from whatever remains of the request after the fixed-size arguments.
+        self._args_tail_dtype = None
+        if self._arg_dtypes and is_variable_size_dtype(self._arg_dtypes[-1]):
+            self._args_tail_dtype = self._arg_dtypes[-1]
+        arg_head_dtypes = self._arg_dtypes if self._args_tail_dtype is None else self._arg_dtypes[:-1]
+        self._args_struct = None if DTypeID.DTYPE in self._arg_dtypes else dtypes_struct(arg_head_dtypes)
+        self._return_dtypes = tuple(ret.dtype for ret in command_descriptor.returns)
+        self._reply_prefix = self.msg_prefix + bytes([ExcID.NO_ERROR])
+        # Packs the whole reply-message at once, i.e. reply-prefix and all fixed-size return values. A variable-size
+        # return value, e.g. the BLOB of GetPropertyValue, can only be the last one and will simply be appended.
+        self._reply_tail_dtype = None
+        if self._return_dtypes and is_variable_size_dtype(self._return_dtypes[-1]):
+            self._reply_tail_dtype = self._return_dtypes[-1]
+        return_head_dtypes = self._return_dtypes if self._reply_tail_dtype is None else self._return_dtypes[:-1]
+        self._reply_struct = dtypes_struct(return_head_dtypes, prefix_size=len(self._reply_prefix))
+
+    def register_exception(self, exception: HdcCmdException) -> None:
+        """Declares a further exception that this command may raise, which hosts will learn about via the IDL-JSON."""
+        self.command_descriptor.register_exception(exception)
+        self.feature_service.device_service.invalidate_idl_cache()
 
     def _command_request_handler(self, request_message: bytes) -> None:
         try:
-            if self.command_descriptor.args is None:
-                parsed_arguments = None
+            if self._args_struct is None:  # No struct, because of a DTYPE or a variable-size argument that isn't last
+                parsed_arguments = parse_command_request_payload(request_message=request_message,
+                                                                 expected_data_types=self._arg_dtypes)
             else:
-                parsed_arguments = parse_command_request_payload(
-                    request_message=request_message,
-                    expected_data_types=[arg.dtype for arg in self.command_descriptor.args])
+                # Checking the size beforehand, instead of relying on struct.error, for the same error messages as
+                # the generic payload parser.
+                payload_size = len(request_message) - 3  # Strip MsgID + FeatureID + CmdID
+                if payload_size < self._args_struct.size:
+                    raise HdcDataTypeError("Payload is shorter than expected.")
+                if self._args_tail_dtype is None:
+                    if payload_size > self._args_struct.size:
+                        if not self._arg_dtypes:
+                            raise HdcDataTypeError("Payload was expected to be empty, but it isn't.")
+                        raise HdcDataTypeError("Payload is longer than expected.")
+                    parsed_arguments = self._args_struct.unpack(request_message[3:])
+                else:
+                    tail_offset = 3 + self._args_struct.size
+                    parsed_arguments = (*self._args_struct.unpack(request_message[3:tail_offset]),
+                                        bytes_to_value(self._args_tail_dtype, request_message[tail_offset:]))
         except HdcDataTypeError as e:
             raise HdcCmdExc_InvalidArgs(exception_message=str(e))
 
+        return_values = self._call_command_implementation(*parsed_arguments)
+
+        if return_values is None:
+            return_values = ()
+        elif not isinstance(return_values, (tuple, list)):
+            return_values = (return_values,)
+
+        if len(return_values) != len(self._return_dtypes):
+            raise RuntimeError("Command implementation did not return the expected number of return values")
+
+        # The struct is lenient about Python types, e.g. packs an int as FLOAT, thus checking them like value_to_bytes()
+        # does. Unsuitable types will make value_to_bytes() raise the appropriate HdcDataTypeError below.
+        if self._reply_struct is not None and all(map(is_suitable_value, self._return_dtypes, return_values)):
+            try:
+                if self._reply_tail_dtype is None:
+                    reply = self._reply_struct.pack(self._reply_prefix, *return_values)
+                else:
+                    reply = self._reply_struct.pack(self._reply_prefix, *return_values[:-1]) + \
+                        value_to_bytes(self._reply_tail_dtype, return_values[-1])
+            except struct.error as e:
+                raise HdcDataTypeError(str(e))
+        else:
+            reply_chunks = [self._reply_prefix]
+            reply_chunks.extend(map(value_to_bytes, self._return_dtypes, return_values))
+            reply = b"".join(reply_chunks)
+        self.router.send_reply_for_pending_request(reply)
+
+    def _call_command_implementation(self, *args) -> typing.Any:
+        """Calls the implementation, translating any exception it raises into an HdcCmdException for the host"""
         try:
-            if parsed_arguments is None:
-                return_values = self.command_implementation()
-            else:
-                return_values = self.command_implementation(*parsed_arguments)
+            return self.command_implementation(*args)
         except HdcCmdException as e:
             # Sanity-checking against exception descriptors registered for this command
             registered_exception_descriptor = self.command_descriptor.raises.get(e.exception_id)
@@ -110,61 +208,72 @@ class CommandService:
             raise HdcCmdExc_InvalidArgs(exception_message=str(e))
         except Exception as e:
             raise HdcCmdExc_CommandFailed(exception_message=str(e))
-        else:
-            reply = bytearray(self.msg_prefix)
-            reply.append(ExcID.NO_ERROR)
-
-        if return_values is None:
-            return_values = tuple()
-        elif not isinstance(return_values, tuple) and not isinstance(return_values, list):
-            return_values = tuple([return_values])
-
-        if len(return_values) != len(self.command_descriptor.returns):
-            raise RuntimeError("Command implementation did not return the expected number of return values")
-
-        for i, return_descriptor in enumerate(self.command_descriptor.returns):
-            ret_value = return_values[i]
-            reply.extend(value_to_bytes(return_descriptor.dtype, ret_value))
-        reply = bytes(reply)
-        self.router.send_reply_for_pending_request(reply)
 
 
 class GetPropertyValueCommandService(CommandService):
+    __slots__ = ()
+    COMMAND_DESCRIPTOR = GetPropertyValueCommandDescriptor()
+
     def __init__(self, feature_service: FeatureService):
-        super().__init__(command_descriptor=GetPropertyValueCommandDescriptor(),
+        super().__init__(command_descriptor=self.COMMAND_DESCRIPTOR,
                          feature_service=feature_service,
                          command_implementation=self._command_implementation)
 
+    def _command_request_handler(self, request_message: bytes) -> None:
+        # Specialized for the fixed signature of this command, thus skipping the generic (de-)serialization
+        if len(request_message) != 4:  # MsgID + FeatureID + CmdID + PropertyID
+            # Same error messages as the generic payload parser
+            raise HdcCmdExc_InvalidArgs(exception_message="Payload is shorter than expected."
+                                        if len(request_message) < 4 else "Payload is longer than expected.")
+        value_as_bytes = self._call_command_implementation(request_message[3])
+        self.router.send_reply_for_pending_request(self._reply_prefix + value_as_bytes)
+
     def _command_implementation(self, property_id: int) -> bytes:
         """
         Returns variable data-type, depending on the requested property_id.
         Therefore, returning a still serialized result as BLOB.
         """
-        prop_service = self.feature_service.property_services.get(property_id, None)
+        prop_service = self.feature_service.property_table[property_id]  # property_id was parsed as UINT8
         if prop_service is None:
             raise HdcCmdExc_UnknownProperty()
 
         prop_value = prop_service.property_getter()
-        value_as_bytes = value_to_bytes(prop_service.property_descriptor.dtype, prop_value)
+        encoded_value_cache = prop_service._encoded_value_cache  # Single read, because it's replaced as a whole
+        if encoded_value_cache is not None and encoded_value_cache[0] is prop_value:
+            value_as_bytes = encoded_value_cache[1]  # Getter returned the very same immutable object as last time
+        else:
+            value_as_bytes = value_to_bytes(prop_service.property_descriptor.dtype, prop_value)
+            prop_service._encoded_value_cache = (prop_value, value_as_bytes)
 
-        self.logger.info(f"Replying with {self.command_descriptor.name}({prop_service.property_descriptor}) "
-                         f"-> {repr(prop_value)}")
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(f"Replying with {self.command_descriptor.name}({prop_service.property_descriptor}) "
+                             f"-> {repr(prop_value)}")
         return value_as_bytes
 
 
 class SetPropertyValueCommandService(CommandService):
+    __slots__ = ()
+    COMMAND_DESCRIPTOR = SetPropertyValueCommandDescriptor()
+
     def __init__(self, feature_service: FeatureService):
-        super().__init__(command_descriptor=SetPropertyValueCommandDescriptor(),
+        super().__init__(command_descriptor=self.COMMAND_DESCRIPTOR,
                          feature_service=feature_service,
                          command_implementation=self._command_implementation)
 
+    def _command_request_handler(self, request_message: bytes) -> None:
+        # Specialized for the fixed signature of this command, thus skipping the generic (de-)serialization
+        if len(request_message) < 4:  # MsgID + FeatureID + CmdID + PropertyID + NewValue
+            raise HdcCmdExc_InvalidArgs(exception_message="Payload is shorter than expected.")  # As generic parser
+        actual_new_value_as_bytes = self._call_command_implementation(request_message[3], request_message[4:])
+        self.router.send_reply_for_pending_request(self._reply_prefix + actual_new_value_as_bytes)
+
     def _command_implementation(self, property_id: int, new_value_as_bytes: bytes) -> bytes:
         """
         Receives and returns variable data-type, depending on the requested property_id.
         Therefore, de-serializing argument from bytes and returning a still serialized result as BLOB.
         """
 
-        prop_service = self.feature_service.property_services.get(property_id, None)
+        prop_service = self.feature_service.property_table[property_id]  # property_id was parsed as UINT8
         if prop_service is None:
             raise HdcCmdExc_UnknownProperty()
 
@@ -177,18 +286,37 @@ class SetPropertyValueCommandService(CommandService):
 
         actual_new_value_as_bytes = value_to_bytes(prop_type, actual_new_value)
 
-        self.logger.log(level=logging.INFO if new_value == actual_new_value else logging.WARNING,
-                        msg=f"Replying with {self.command_descriptor.name}"
-                            f"({prop_service.property_descriptor}, {repr(new_value)}) "
-                            f"-> {repr(actual_new_value)}")
+        log_level = logging.INFO if new_value == actual_new_value else logging.WARNING
+        if self.logger.isEnabledFor(log_level):
+            self.logger.log(level=log_level,
+                            msg=f"Replying with {self.command_descriptor.name}"
+                                f"({prop_service.property_descriptor}, {repr(new_value)}) "
+                                f"-> {repr(actual_new_value)}")
 
         return actual_new_value_as_bytes
 
 
 class EventService:
+    __slots__ = ("logger", "event_descriptor", "feature_service", "router", "msg_prefix", "_arg_names",
+                 "_arg_dtypes", "_message_struct", "_message_tail_dtype")
+
     event_descriptor: EventDescriptor
     feature_service: FeatureService
+    router: hdcproto.device.router.MessageRouter
     msg_prefix: bytes
+    _arg_names: tuple[str, ...]
+    _arg_dtypes: tuple[DTypeID, ...]
+    _message_struct: struct.Struct | None
+    _message_tail_dtype: DTypeID | None
+
+    # Subclasses that always service the same event may declare its descriptor here. It will be validated
+    # once, when the subclass is defined, and then be shared by all instances of that subclass, i.e. by every feature.
+    EVENT_DESCRIPTOR: typing.ClassVar[EventDescriptor | None] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.EVENT_DESCRIPTOR is not None and not isinstance(cls.EVENT_DESCRIPTOR, EventDescriptor):
+            raise TypeError(f"{cls.__name__}.EVENT_DESCRIPTOR must be an EventDescriptor")
 
     def __init__(self,
                  event_descriptor: EventDescriptor,
@@ -198,13 +326,16 @@ class EventService:
         # Logger-name like: "hdcproto.device.service.MyDeviceService.MyFeatureService.MyEventService"
         self.logger = feature_service.logger.getChild(self.__class__.__name__)
 
-        if not isinstance(event_descriptor, EventDescriptor):
-            raise TypeError
+        # Trusting the descriptor declared by a subclass, because __init_subclass__ already validated it
+        if event_descriptor is None or event_descriptor is not self.EVENT_DESCRIPTOR:
+            if not isinstance(event_descriptor, EventDescriptor):
+                raise TypeError
         self.event_descriptor = event_descriptor
 
-        self.logger.debug(f"Initializing instance of {self.__class__.__name__} "
-                          f"to {event_descriptor} "
-                          f"on {feature_service.feature_descriptor}")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Initializing instance of {self.__class__.__name__} "
+                              f"to {event_descriptor} "
+                              f"on {feature_service.feature_descriptor}")
 
         # Reference from feature --> event
         if event_descriptor.id in feature_service.event_services:
@@ -214,54 +345,74 @@ class EventService:
         feature_service.event_services[event_descriptor.id] = self
 
         self.feature_service = feature_service  # Reference from event --> feature
+        self.router = feature_service.router  # Shortcut for the hot path. The router of a device is never replaced.
 
         # Ensure the descriptor of the feature includes this event's descriptor
-        self.feature_service.feature_descriptor.events[event_descriptor.id] = event_descriptor
+        register_by_id(self.feature_service.feature_descriptor.events, event_descriptor)
+        feature_service.device_service.invalidate_idl_cache()
 
         self.msg_prefix = bytes([int(MessageTypeID.EVENT),
                                  self.feature_service.feature_descriptor.id,
                                  self.event_descriptor.id])
 
-    @property
-    def router(self) -> hdcproto.device.router.MessageRouter:
-        return self.feature_service.device_service.router
+        # Packs the whole event-message at once, i.e. message-prefix and all fixed-size arguments. A variable-size
+        # argument, e.g. the message of a Log-event, can only be the last one and will simply be appended.
+        self._arg_names = tuple(arg.name for arg in event_descriptor.args) if event_descriptor.args else tuple()
+        self._arg_dtypes = tuple(arg.dtype for arg in event_descriptor.args) if event_descriptor.args else tuple()
+        self._message_tail_dtype = None
+        if self._arg_dtypes and is_variable_size_dtype(self._arg_dtypes[-1]):
+            self._message_tail_dtype = self._arg_dtypes[-1]
+        arg_head_dtypes = self._arg_dtypes if self._message_tail_dtype is None else self._arg_dtypes[:-1]
+        self._message_struct = dtypes_struct(arg_head_dtypes, prefix_size=len(self.msg_prefix))
 
     def emit(self, *args, **kwargs) -> None:
-        event_message = bytearray(self.msg_prefix)
-
-        expected_args = self.event_descriptor.args
-        num_expected_args = len(expected_args)
+        num_expected_args = len(self._arg_names)
 
         if len(args) > num_expected_args:
             raise ValueError(f"Unexpected positional arguments. "
                              f"Expected {num_expected_args}, but {len(args)} were given.")
 
-        for i, d in enumerate(expected_args):
-            if i < len(args):
-                arg_value = args[i]
-            else:
-                if d.name not in kwargs.keys():
-                    raise ValueError(f"Missing argument {d.name}")
-                arg_value = kwargs.pop(d.name)
-            arg_as_raw_bytes = value_to_bytes(d.dtype, arg_value)
-            event_message.extend(arg_as_raw_bytes)
+        arg_values = list(args)
+        for arg_name in self._arg_names[len(args):]:
+            if arg_name not in kwargs:
+                raise ValueError(f"Missing argument {arg_name}")
+            arg_values.append(kwargs.pop(arg_name))
 
         if kwargs:
             raise ValueError(f"Unexpected keyword arguments: {repr(kwargs.keys())}")
 
-        event_message = bytes(event_message)
+        # The struct is lenient about Python types, e.g. packs an int as FLOAT, thus checking them like value_to_bytes()
+        # does. Unsuitable types will make value_to_bytes() raise the appropriate HdcDataTypeError below.
+        if self._message_struct is not None and all(map(is_suitable_value, self._arg_dtypes, arg_values)):
+            try:
+                if self._message_tail_dtype is None:
+                    event_message = self._message_struct.pack(self.msg_prefix, *arg_values)
+                else:
+                    event_message = self._message_struct.pack(self.msg_prefix, *arg_values[:-1]) + \
+                        value_to_bytes(self._message_tail_dtype, arg_values[-1])
+            except struct.error as e:
+                raise HdcDataTypeError(str(e))
+        else:
+            event_message_chunks = [self.msg_prefix]
+            event_message_chunks.extend(map(value_to_bytes, self._arg_dtypes, arg_values))
+            event_message = b"".join(event_message_chunks)  # Single allocation, instead of growing a bytearray
 
         self.router.send_event_message(event_message=event_message)
 
 
 class LogEventService(EventService):
+    __slots__ = ()
+    EVENT_DESCRIPTOR = LogEventDescriptor()
+
     def __init__(self, feature_service: FeatureService):
-        super().__init__(event_descriptor=LogEventDescriptor(),
+        super().__init__(event_descriptor=self.EVENT_DESCRIPTOR,
                          feature_service=feature_service)
 
     def emit(self, log_level: int, log_msg: str) -> None:
         if log_level >= self.feature_service.log_event_threshold:
-            self.logger.info(f"Sending {self.event_descriptor} -> ({logging.getLevelName(log_level)}, '{log_msg}')")
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info(f"Sending {self.event_descriptor} -> "
+                                 f"({logging.getLevelName(log_level)}, '{log_msg}')")
             super().emit(log_level=log_level, log_msg=log_msg)
 
 
@@ -271,6 +422,10 @@ class HdcLoggingHandler(logging.Handler):
     def __init__(self, log_event_service: LogEventService):
         super().__init__()
         self.log_event_service = log_event_service
+        # Records below the LogEventThreshold of the HDC-feature will be dropped by Python logging before they reach
+        # this handler, thus skipping the formatting, which is the expensive part. FeatureService sets the level of
+        # this handler and keeps it in sync, also for further instances that an application attaches to its loggers.
+        log_event_service.feature_service.register_logging_handler(self)
 
     def emit(self, record):
         # noinspection PyBroadException
@@ -284,22 +439,41 @@ class HdcLoggingHandler(logging.Handler):
 
 
 class FeatureStateTransitionEventService(EventService):
+    __slots__ = ()
+    EVENT_DESCRIPTOR = FeatureStateTransitionEventDescriptor()
+
     def __init__(self, feature_service: FeatureService):
-        super().__init__(event_descriptor=FeatureStateTransitionEventDescriptor(),
+        super().__init__(event_descriptor=self.EVENT_DESCRIPTOR,
                          feature_service=feature_service)
 
     def emit(self, previous_state_id: int, current_state_id: int) -> None:
-        validate_uint8(previous_state_id)
-        validate_uint8(current_state_id)
-        self.logger.info(f"Sending {self.event_descriptor} -> (0x{previous_state_id:02X}, 0x{current_state_id:02X}')")
-        super().emit(previous_state_id=previous_state_id, current_state_id=current_state_id)
+        # Single inline check of both arguments, instead of two validate_uint8() calls for every state transition
+        is_valid = (type(previous_state_id) is int and type(current_state_id) is int and
+                    0x00 <= previous_state_id <= 0xFF and 0x00 <= current_state_id <= 0xFF)
+        if not is_valid:
+            validate_uint8(previous_state_id)  # Raises with the original error messages
+            validate_uint8(current_state_id)
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(f"Sending {self.event_descriptor} -> "
+                             f"(0x{previous_state_id:02X}, 0x{current_state_id:02X}')")
+        if is_valid:
+            # Bypassing the generic argument handling of EventService.emit(), since both arguments were checked above
+            self.router.send_event_message(event_message=self.msg_prefix + bytes((previous_state_id,
+                                                                                  current_state_id)))
+        else:
+            # e.g. an IntEnum, or a bool, which value_to_bytes() rejects with the appropriate HdcDataTypeError
+            super().emit(previous_state_id=previous_state_id, current_state_id=current_state_id)
 
 
 class PropertyService:
+    __slots__ = ("logger", "property_descriptor", "feature_service", "property_getter", "property_setter",
+                 "_encoded_value_cache")
+
     property_descriptor: PropertyDescriptor
     feature_service: FeatureService
     property_getter: typing.Callable[[None], int | float | str | bytes | DTypeID]
     property_setter: typing.Callable[[int | float | str | bytes], int | float | str | bytes | DTypeID] | None
+    _encoded_value_cache: tuple[int | float | str | bytes | DTypeID, bytes] | None
 
     def __init__(self,
                  property_descriptor: PropertyDescriptor,
@@ -315,9 +489,10 @@ class PropertyService:
             raise TypeError
         self.property_descriptor = property_descriptor
 
-        self.logger.debug(f"Initializing instance of {self.__class__.__name__} "
-                          f"to service {property_descriptor} "
-                          f"on {feature_service.feature_descriptor}")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Initializing instance of {self.__class__.__name__} "
+                              f"to service {property_descriptor} "
+                              f"on {feature_service.feature_descriptor}")
 
         # Reference from feature --> property
         if property_descriptor.id in feature_service.property_services:
@@ -326,24 +501,40 @@ class PropertyService:
                                 f"new instance of type {self.__class__.__name__} to service "
                                 f"{property_descriptor}")
         feature_service.property_services[property_descriptor.id] = self
+        feature_service.property_table[property_descriptor.id] = self
 
         self.feature_service = feature_service  # Reference from property --> feature
 
         # Ensure the descriptor of the feature includes this property's descriptor
-        self.feature_service.feature_descriptor.properties[property_descriptor.id] = property_descriptor
+        register_by_id(self.feature_service.feature_descriptor.properties, property_descriptor)
+        feature_service.device_service.invalidate_idl_cache()
 
         self.property_getter = property_getter  # ToDo: Validate getter signature
         self.property_setter = property_setter  # ToDo: Validate setter signature
 
+        # Last value returned by the getter along with its serialization. Property values are immutable objects,
+        # thus a getter returning the identical object, e.g. a constant or a rarely changing str, can skip encoding.
+        self._encoded_value_cache = None
+
 
 class FeatureService:
+    __slots__ = ("logger", "feature_descriptor", "device_service", "router",
+                 "_current_state_id", "_log_event_threshold",
+                 "command_services", "_cmd_get_property_value", "_cmd_set_property_value",
+                 "event_services", "_evt_state_transition", "_evt_log", "hdc_logger", "_hdc_logging_handlers",
+                 "property_services", "property_table", "_prop_log_event_threshold", "_prop_feature_state")
+
     feature_descriptor: FeatureDescriptor
     device_service: DeviceService
+    router: hdcproto.device.router.MessageRouter
     command_services: dict[int, CommandService]
     event_services: dict[int, EventService]
     property_services: dict[int, PropertyService]
+    property_table: list[PropertyService | None]  # Same as property_services, but indexed by all 256 possible IDs
 
     _current_state_id: int
+    _log_event_threshold: int
+    _hdc_logging_handlers: weakref.WeakSet[HdcLoggingHandler]  # All handlers emitting Log-events of this feature
 
     def __init__(self,
                  feature_descriptor: FeatureDescriptor,
@@ -357,7 +548,8 @@ class FeatureService:
             raise TypeError
         self.feature_descriptor = feature_descriptor
 
-        self.logger.debug(f"Initializing instance of {self.__class__.__name__} to service {feature_descriptor}")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Initializing instance of {self.__class__.__name__} to service {feature_descriptor}")
 
         # Reference from device --> feature
         if feature_descriptor.id in device_service.feature_services:
@@ -367,13 +559,15 @@ class FeatureService:
         device_service.feature_services[feature_descriptor.id] = self
 
         self.device_service = device_service  # Reference from feature --> device
+        self.router = device_service.router  # Shortcut, because the router of a device is never replaced
 
         # Ensure the descriptor of the device includes this feature's descriptor
-        self.device_service.device_descriptor.features[feature_descriptor.id] = feature_descriptor
+        register_by_id(self.device_service.device_descriptor.features, feature_descriptor)
+        self.device_service.invalidate_idl_cache()
 
         # Actual attributes holding the values for the two mandatory HDC-properties of this feature.
         self._current_state_id = 0  # ToDo: Should we establish a convention about initializing states to zero? Nah...
-        self.log_event_threshold = logging.WARNING
+        self._log_event_threshold = logging.WARNING
 
         # Commands
         self.command_services = dict()
@@ -386,11 +580,15 @@ class FeatureService:
         self._evt_log = LogEventService(self)
 
         # Use a dedicated logger for this feature-instance, whose logs will be forwarded as HDC Log-events to the host.
-        self.hdc_logger = logging.getLogger(str(uuid.uuid4()))
+        # Its name must be unique, because several devices may instantiate the same feature within one process.
+        # No dots in its name, thus its parent is the root logger.
+        self.hdc_logger = logging.getLogger(f"hdc_logger_{next(_hdc_logger_ids)}")
+        self._hdc_logging_handlers = weakref.WeakSet()
         self.hdc_logger.addHandler(HdcLoggingHandler(log_event_service=self._evt_log))
 
         # Properties
         self.property_services = dict()
+        self.property_table = [None] * 256  # Saves hashing the property_id of every Get/SetPropertyValue request
         self._prop_log_event_threshold = PropertyService(
             feature_service=self,
             property_descriptor=LogEventThresholdPropertyDescriptor(),
@@ -410,28 +608,34 @@ class FeatureService:
         # of the same rationale as explained here:
         #      https://docs.python.org/3.10/howto/logging.html#custom-levels
 
-        new_threshold = int(new_threshold)
-
-        if new_threshold < logging.DEBUG:
-            new_threshold = logging.DEBUG
-
-        if new_threshold > logging.CRITICAL:
-            new_threshold = logging.CRITICAL
-
         # Rounding to the nearest multiple of 10. https://stackoverflow.com/a/2422723/20337562
-        new_threshold = ((new_threshold + 5) // 10) * 10
+        # Rounding before clamping is fine, because DEBUG and CRITICAL are multiples of 10, too.
+        new_threshold = min(logging.CRITICAL, max(logging.DEBUG, ((int(new_threshold) + 5) // 10) * 10))
 
-        self.logger.info(f"Changing LogEventThreshold from "
-                         f"previously {logging.getLevelName(self.log_event_threshold)} "
-                         f"to now {logging.getLevelName(new_threshold)}.")
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(f"Changing LogEventThreshold from "
+                             f"previously {_LOG_LEVEL_NAMES.get(self.log_event_threshold, self.log_event_threshold)} "
+                             f"to now {_LOG_LEVEL_NAMES[new_threshold]}.")
 
         self.log_event_threshold = new_threshold
 
         return self.log_event_threshold
 
+    def register_logging_handler(self, hdc_logging_handler: HdcLoggingHandler) -> None:
+        """Keeps the level of the given handler in sync with the LogEventThreshold of this feature."""
+        hdc_logging_handler.setLevel(self.log_event_threshold)
+        self._hdc_logging_handlers.add(hdc_logging_handler)
+
     @property
-    def router(self) -> hdcproto.device.router.MessageRouter:
-        return self.device_service.router
+    def log_event_threshold(self) -> int:
+        return self._log_event_threshold
+
+    @log_event_threshold.setter
+    def log_event_threshold(self, new_threshold: int) -> None:
+        self._log_event_threshold = new_threshold
+        # Python logging will then drop any records below the threshold, before even calling the HdcLoggingHandlers
+        for hdc_logging_handler in self._hdc_logging_handlers:
+            hdc_logging_handler.setLevel(new_threshold)
 
     @property
     def current_state_id(self) -> int:
@@ -439,21 +643,25 @@ class FeatureService:
         return self._current_state_id
 
     def switch_state(self, new_feature_state_id: int):
-        if self.feature_descriptor.states is None:
+        states = self.feature_descriptor.states
+        if states is None:
             raise RuntimeError("Cannot switch feature state if none were registered for this feature")
 
-        if new_feature_state_id not in self.feature_descriptor.states:
+        if new_feature_state_id not in states:
             raise ValueError(f"Unknown state_id {new_feature_state_id}")
 
         previous_state_id = self._current_state_id
-        self.logger.info(f"Transitioning FeatureState from previously 0x{previous_state_id:02X} to "
-                         f"now 0x{new_feature_state_id:02X}.")
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(f"Transitioning FeatureState from previously 0x{previous_state_id:02X} to "
+                             f"now 0x{new_feature_state_id:02X}.")
         self._current_state_id = new_feature_state_id
         self._evt_state_transition.emit(previous_state_id=previous_state_id,
                                         current_state_id=new_feature_state_id)
 
 
 class CoreFeatureService(FeatureService):
+    __slots__ = ()
+
     def __init__(self,
                  device_service: DeviceService,
                  feature_states: typing.Type[enum.IntEnum] | list[StateDescriptor] | None = None):
@@ -471,6 +679,9 @@ class CoreFeatureService(FeatureService):
 
 
 class DeviceService:
+    __slots__ = ("logger", "device_name", "device_version", "device_doc", "device_descriptor", "router",
+                 "feature_services", "_cleanup_closure", "_idl_json_cache", "_idl_json_lock")
+
     device_name: str
     device_version: semver.VersionInfo | None
     device_doc: str | None
@@ -478,6 +689,8 @@ class DeviceService:
     router: hdcproto.device.router.MessageRouter
     feature_services: dict[int, FeatureService]
     _cleanup_closure: typing.Callable[[], None] | None
+    _idl_json_cache: bytes | None
+    _idl_json_lock: threading.Lock
 
     def __init__(self,
                  device_name: str,
@@ -499,9 +712,11 @@ class DeviceService:
             max_req=max_req
         )
 
+        self._idl_json_cache = None
+        self._idl_json_lock = threading.Lock()
         self.router = hdcproto.device.router.MessageRouter(transport=transport,
                                                            max_req=max_req,
-                                                           idl_json_generator=self.device_descriptor.to_idl_json)
+                                                           idl_json_generator=self.to_idl_json_bytes)
         self.feature_services = dict()
         self._cleanup_closure = None
 
@@ -509,6 +724,23 @@ class DeviceService:
     def is_connected(self):
         return self.router.is_connected
 
+    def to_idl_json_bytes(self) -> bytes:
+        """
+        Same as self.device_descriptor.to_idl_json_bytes(), but only re-generated after the services of this device
+        have (un-)registered any descriptors. Call invalidate_idl_cache() after modifying any descriptor directly.
+        """
+        idl_json = self._idl_json_cache
+        if idl_json is None:
+            # Callers from several threads (e.g. routers of tunneled sub-devices) will wait for a single generation
+            with self._idl_json_lock:
+                if self._idl_json_cache is None:
+                    self._idl_json_cache = self.device_descriptor.to_idl_json_bytes()
+                idl_json = self._idl_json_cache
+        return idl_json
+
+    def invalidate_idl_cache(self) -> None:
+        self._idl_json_cache = None
+
     def connect(self, transport: TransportBase | str | None = None):
         self.router.connect(transport=transport)
 
@@ -534,14 +766,16 @@ class DeviceService:
         if tunnel_id in parent_device.device_descriptor.tunnels.keys():
             raise ValueError(f"Tunnel ID 0x{tunnel_id:02X} is already being used")
 
-        parent_device.device_descriptor.tunnels[tunnel_id] = TunnelDescriptor(
+        register_by_id(parent_device.device_descriptor.tunnels, TunnelDescriptor(
             id=tunnel_id,
             name=self.device_name,
             protocol="HDC",
-            doc=self.device_doc)
+            doc=self.device_doc))
+        parent_device.invalidate_idl_cache()
 
         def cleanup_closure():  # Will be called by close() to unregister tunnel-descriptor
             del parent_device.device_descriptor.tunnels[tunnel_id]
+            parent_device.invalidate_idl_cache()
 
         self._cleanup_closure = cleanup_closure
 
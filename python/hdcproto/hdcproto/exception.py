@@ -3,7 +3,7 @@ from __future__ import annotations
 import enum
 import typing
 
-from hdcproto.spec import ExcID, DTypeID
+from hdcproto.spec import ExcID
 from hdcproto.validate import validate_uint8, validate_mandatory_name
 
 
@@ -19,13 +19,6 @@ class HdcDataTypeError(HdcError):
     pass
 
 
-def prune_none_values(d: typing.MutableMapping[str, typing.Any]) -> None:
-    """Removes elements with a None value"""
-    keys_of_none_items = [key for key, value in d.items() if value is None]
-    for k in keys_of_none_items:
-        del (d[k])
-
-
 class HdcCmdException(HdcError):
     """
     (Base)-class of objects that can be:
@@ -74,12 +67,11 @@ class HdcCmdException(HdcError):
 
         Override this implementation in any subclass that may need to parse custom data from the given message.
         """
-        from hdcproto.parse import parse_payload  # Postponed import to avoid circular dependency
-
-        (exc_id,
-         exc_text) = parse_payload(raw_payload=hdc_message[3:],  # Strip 3 leading bytes: MsgID + FeatureID + CmdID
-                                   expected_data_types=[DTypeID.UINT8,  # Forth byte is ExcID
-                                                        DTypeID.UTF8])  # Remainder is Exception text and may be empty
+        if len(hdc_message) < 4:  # MsgID + FeatureID + CmdID + ExcID
+            raise HdcDataTypeError("Payload is shorter than expected.")
+        exc_id = hdc_message[3]  # Forth byte is ExcID
+        # Remainder is Exception text and may be empty. Decoded straight from the message, without copying a slice.
+        exc_text = str(memoryview(hdc_message)[4:], encoding="utf-8", errors="strict")
         if exc_id != self.exception_id:
             raise ValueError(f"Mismatching Exception-ID in HDC reply message. "
                              f"Expected 0x{self.exception_id:02X}, but received 0x{exc_id:02X}")
@@ -96,12 +88,13 @@ class HdcCmdException(HdcError):
         return self.__class__(exc_text)
 
     def to_idl_dict(self):
+        # Only inserting the optional doc item if it's not None, instead of pruning it afterwards
         result = dict(
             id=self.exception_id,
-            name=self.exception_name,
-            doc=self.exception_doc  # This is a crazy experiment.
+            name=self.exception_name
         )
-        prune_none_values(result)
+        if self.exception_doc is not None:
+            result['doc'] = self.exception_doc  # This is a crazy experiment.
         return result
 
     @classmethod
@@ -109,51 +102,76 @@ class HdcCmdException(HdcError):
         return cls(**d)
 
 
-# noinspection PyPep8Naming
-class HdcCmdExc_CommandFailed(HdcCmdException):
+class _ReservedHdcCmdException(HdcCmdException):
+    """
+    Base-class of the exceptions reserved by the HDC-spec, whose ID, name and doc are declared as class attributes.
+    Those are validated once, when each subclass is defined, instead of every time an exception is instantiated.
+    """
+    EXCEPTION_ID: typing.ClassVar[ExcID]
+    EXCEPTION_DOC: typing.ClassVar[str | None] = None
+
+    _exception_id: typing.ClassVar[int]
+    _exception_name: typing.ClassVar[str]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not isinstance(cls.EXCEPTION_ID, ExcID):
+            raise TypeError(f"{cls.__name__}.EXCEPTION_ID must be an ExcID")
+        cls._exception_id = validate_uint8(int(cls.EXCEPTION_ID))
+        cls._exception_name = validate_mandatory_name(cls.EXCEPTION_ID.name)
+
+    # noinspection PyMissingConstructor
     def __init__(self, exception_message: str | None = None):
-        super().__init__(id=ExcID.CommandFailed,
-                         exception_message=exception_message)
+        # Not calling HdcCmdException.__init__(), because the class attributes have already been validated
+        self.exception_message = exception_message
+        self.exception_id = self._exception_id
+        self.exception_name = self._exception_name
+        self.exception_doc = self.EXCEPTION_DOC
 
 
 # noinspection PyPep8Naming
-class HdcCmdExc_UnknownFeature(HdcCmdException):
-    def __init__(self, exception_message: str | None = None):
-        super().__init__(id=ExcID.UnknownFeature,
-                         exception_message=exception_message)
+class HdcCmdExc_CommandFailed(_ReservedHdcCmdException):
+    EXCEPTION_ID = ExcID.CommandFailed
 
 
 # noinspection PyPep8Naming
-class HdcCmdExc_UnknownCommand(HdcCmdException):
-    def __init__(self, exception_message: str | None = None):
-        super().__init__(id=ExcID.UnknownCommand,
-                         exception_message=exception_message)
+class HdcCmdExc_UnknownFeature(_ReservedHdcCmdException):
+    EXCEPTION_ID = ExcID.UnknownFeature
 
 
 # noinspection PyPep8Naming
-class HdcCmdExc_InvalidArgs(HdcCmdException):
-    def __init__(self, exception_message: str | None = None):
-        super().__init__(id=ExcID.InvalidArgs,
-                         exception_message=exception_message)
+class HdcCmdExc_UnknownCommand(_ReservedHdcCmdException):
+    EXCEPTION_ID = ExcID.UnknownCommand
 
 
 # noinspection PyPep8Naming
-class HdcCmdExc_NotNow(HdcCmdException):
-    def __init__(self, exception_message: str | None = None):
-        super().__init__(id=ExcID.NotNow,
-                         doc="Command can't be executed at this moment.",
-                         exception_message=exception_message)
+class HdcCmdExc_InvalidArgs(_ReservedHdcCmdException):
+    EXCEPTION_ID = ExcID.InvalidArgs
 
 
 # noinspection PyPep8Naming
-class HdcCmdExc_UnknownProperty(HdcCmdException):
-    def __init__(self, exception_message: str | None = None):
-        super().__init__(id=ExcID.UnknownProperty,
-                         exception_message=exception_message)
+class HdcCmdExc_NotNow(_ReservedHdcCmdException):
+    EXCEPTION_ID = ExcID.NotNow
+    EXCEPTION_DOC = "Command can't be executed at this moment."
 
 
 # noinspection PyPep8Naming
-class HdcCmdExc_ReadOnlyProperty(HdcCmdException):
-    def __init__(self, exception_message: str | None = None):
-        super().__init__(id=ExcID.ReadOnlyProperty,
-                         exception_message=exception_message)
+class HdcCmdExc_UnknownProperty(_ReservedHdcCmdException):
+    EXCEPTION_ID = ExcID.UnknownProperty
+
+
+# noinspection PyPep8Naming
+class HdcCmdExc_ReadOnlyProperty(_ReservedHdcCmdException):
+    EXCEPTION_ID = ExcID.ReadOnlyProperty
+
+
+# Subclasses of the exceptions reserved by the HDC-spec, looked up by their Exception.id
+HDC_CMD_EXC_CLASSES: dict[int, typing.Type[HdcCmdException]] = {
+    ExcID.CommandFailed: HdcCmdExc_CommandFailed,
+    ExcID.UnknownFeature: HdcCmdExc_UnknownFeature,
+    ExcID.UnknownCommand: HdcCmdExc_UnknownCommand,
+    ExcID.InvalidArgs: HdcCmdExc_InvalidArgs,
+    ExcID.NotNow: HdcCmdExc_NotNow,
+    ExcID.UnknownProperty: HdcCmdExc_UnknownProperty,
+    ExcID.ReadOnlyProperty: HdcCmdExc_ReadOnlyProperty,
+}
@@ -18,9 +18,7 @@ from hdcproto.descriptor import (DeviceDescriptor, FeatureDescriptor, CommandDes
                                  LogEventThresholdPropertyDescriptor, GetPropertyValueCommandDescriptor,
                                  SetPropertyValueCommandDescriptor, LogEventDescriptor,
                                  FeatureStateTransitionEventDescriptor, TunnelDescriptor)
-from hdcproto.exception import (HdcError, HdcCmdException, HdcCmdExc_CommandFailed, HdcCmdExc_UnknownFeature,
-                                HdcCmdExc_UnknownCommand, HdcCmdExc_InvalidArgs, HdcCmdExc_NotNow,
-                                HdcCmdExc_UnknownProperty, HdcCmdExc_ReadOnlyProperty)
+from hdcproto.exception import HdcError, HdcCmdException, HDC_CMD_EXC_CLASSES
 from hdcproto.parse import value_to_bytes, bytes_to_value, parse_command_reply_payload, parse_event_payload
 from hdcproto.spec import (MessageTypeID, CmdID, ExcID, EvtID, PropID, MetaID, DTypeID)
 from hdcproto.transport.base import TransportBase
@@ -912,21 +910,9 @@ class DeviceProxyBase:
         # Exceptions
         # Special case, because HdcCmdException and its subclasses serve as descriptor, service *and* proxy !
         if descriptor.__class__ == HdcCmdException:  # If not already subclassed, then look-up more specialized class
-            exc_id = descriptor.exception_id
-            if exc_id == ExcID.CommandFailed:
-                return HdcCmdExc_CommandFailed()
-            if exc_id == ExcID.UnknownFeature:
-                return HdcCmdExc_UnknownFeature()
-            if exc_id == ExcID.UnknownCommand:
-                return HdcCmdExc_UnknownCommand()
-            if exc_id == ExcID.InvalidArgs:
-                return HdcCmdExc_InvalidArgs()
-            if exc_id == ExcID.NotNow:
-                return HdcCmdExc_NotNow()
-            if exc_id == ExcID.UnknownProperty:
-                return HdcCmdExc_UnknownProperty()
-            if exc_id == ExcID.ReadOnlyProperty:
-                return HdcCmdExc_ReadOnlyProperty()
+            exc_class = HDC_CMD_EXC_CLASSES.get(descriptor.exception_id)
+            if exc_class is not None:
+                return exc_class()  # Own instance for each proxy, since applications may modify or even raise it
             # ... else, baseclass instance will also work
             return descriptor
 
@@ -8,35 +8,60 @@ from hdcproto.spec import DTypeID
 from hdcproto.validate import validate_dtype
 
 
+# Pre-compiled struct for each data type, saving the dispatch on the data type and the lookup of the format string
+# in the cache of the struct module on every value being (de-)serialized. Variable size types map to None.
+_DTYPE_STRUCTS: dict[DTypeID, struct.Struct | None] = {
+    DTypeID.BOOL: struct.Struct("?"),
+    DTypeID.UINT8: struct.Struct("B"),
+    DTypeID.UINT16: struct.Struct("<H"),
+    DTypeID.UINT32: struct.Struct("<I"),
+    DTypeID.INT8: struct.Struct("<b"),
+    DTypeID.INT16: struct.Struct("<h"),
+    DTypeID.INT32: struct.Struct("<i"),
+    DTypeID.FLOAT: struct.Struct("<f"),
+    DTypeID.DOUBLE: struct.Struct("<d"),
+    DTypeID.BLOB: None,  # Meaning: Variable size. Inferred from the size of the received payload.
+    DTypeID.UTF8: None,  # Meaning: Variable size. Inferred from the size of the received payload.
+    DTypeID.DTYPE: struct.Struct("B"),  # Equivalent to a UINT8 value at the bytes level
+}
+
+
+# Python types that value_to_bytes() accepts for each data type, as (accepted types, rejected types). Unlike the
+# pre-compiled structs, which would also accept e.g. an int for a FLOAT, a bool for a UINT8 or any object for a BOOL.
+_DTYPE_VALUE_TYPES: dict[DTypeID, tuple[type, tuple[type, ...]]] = {
+    DTypeID.BOOL: (bool, ()),
+    DTypeID.UINT8: (int, (bool, DTypeID)),
+    DTypeID.UINT16: (int, (bool, DTypeID)),
+    DTypeID.UINT32: (int, (bool, DTypeID)),
+    DTypeID.INT8: (int, (bool, DTypeID)),
+    DTypeID.INT16: (int, (bool, DTypeID)),
+    DTypeID.INT32: (int, (bool, DTypeID)),
+    DTypeID.FLOAT: (float, ()),
+    DTypeID.DOUBLE: (float, ()),
+    DTypeID.BLOB: (bytes, ()),
+    DTypeID.UTF8: (str, ()),
+    DTypeID.DTYPE: (DTypeID, ()),
+}
+
+
+def is_suitable_value(dtype: DTypeID, value: typing.Any) -> bool:
+    """
+    Whether value_to_bytes() would accept the Python type of the value for the given data type.
+    Does not check the range of the value, which is left to struct.pack()
+    """
+    accepted_type, rejected_types = _DTYPE_VALUE_TYPES[dtype]
+    return isinstance(value, accepted_type) and not isinstance(value, rejected_types)
+
+
 def dtype_struct_format(dtype: DTypeID) -> str | None:
     """Format character used to (de-)serialize this data type with the struct.pack() and struct.unpack() methods"""
     validate_dtype(dtype)
 
-    if dtype == DTypeID.BOOL:
-        return "?"
-    if dtype == DTypeID.UINT8:
-        return "B"
-    if dtype == DTypeID.UINT16:
-        return "<H"
-    if dtype == DTypeID.UINT32:
-        return "<I"
-    if dtype == DTypeID.INT8:
-        return "<b"
-    if dtype == DTypeID.INT16:
-        return "<h"
-    if dtype == DTypeID.INT32:
-        return "<i"
-    if dtype == DTypeID.FLOAT:
-        return "<f"
-    if dtype == DTypeID.DOUBLE:
-        return "<d"
-    if dtype == DTypeID.BLOB:
-        return None  # Meaning: Variable size. Inferred from the size of the received payload.
-    if dtype == DTypeID.UTF8:
-        return None  # Meaning: Variable size. Inferred from the size of the received payload.
-    if dtype == DTypeID.DTYPE:
-        return "B"  # Equivalent to a UINT8 value at the bytes level
-    raise NotImplemented(f"Unknown DTypeID {dtype}")
+    if dtype not in _DTYPE_STRUCTS:
+        raise NotImplementedError(f"Unknown DTypeID {dtype}")
+
+    dtype_struct = _DTYPE_STRUCTS[dtype]
+    return None if dtype_struct is None else dtype_struct.format
 
 
 def dtype_size(dtype: DTypeID) -> int | None:
@@ -46,11 +71,11 @@ def dtype_size(dtype: DTypeID) -> int | None:
     """
     validate_dtype(dtype)
 
-    fmt = dtype_struct_format(dtype)
-    if fmt is None:
+    dtype_struct = _DTYPE_STRUCTS.get(dtype)
+    if dtype_struct is None:
         return None
 
-    return struct.calcsize(fmt)
+    return dtype_struct.size
 
 
 def is_variable_size_dtype(dtype: DTypeID) -> bool:
@@ -58,6 +83,22 @@ def is_variable_size_dtype(dtype: DTypeID) -> bool:
     return dtype_size(dtype) is None
 
 
+def dtypes_struct(dtypes: typing.Iterable[DTypeID], prefix_size: int = 0) -> struct.Struct | None:
+    """
+    Pre-compiled struct to (de-)serialize a sequence of values of the given data types in a single call.
+    Returns None if any of the data types is of variable size, e.g. UTF8 or BLOB
+
+    A non-zero prefix_size prepends a bytes-field of that size, e.g. to pack a message header along with the values.
+    """
+    fmt = f"<{prefix_size}s" if prefix_size else "<"
+    for dtype in dtypes:
+        dtype_fmt = dtype_struct_format(dtype)
+        if dtype_fmt is None:
+            return None
+        fmt += dtype_fmt.lstrip("<")
+    return struct.Struct(fmt)
+
+
 def value_to_bytes(dtype: DTypeID, value: int | float | str | bytes | DTypeID) -> bytes:
     validate_dtype(dtype)
     if isinstance(value, str):
@@ -70,21 +111,21 @@ def value_to_bytes(dtype: DTypeID, value: int | float | str | bytes | DTypeID) -
             return value
         raise HdcDataTypeError(f"Improper target data type {dtype.name} for a bytes value")
 
-    fmt = dtype_struct_format(dtype)
+    dtype_struct = _DTYPE_STRUCTS.get(dtype)
 
-    if fmt is None:
+    if dtype_struct is None:
         raise HdcDataTypeError(f"Don't know how to convert into {dtype.name}")
 
     if isinstance(value, bool):
         if dtype == DTypeID.BOOL:
-            return struct.pack(fmt, value)
+            return dtype_struct.pack(value)
         else:
             raise HdcDataTypeError(f"Vale of type {value.__class__} is unsuitable "
                                    f"for a property of type {dtype.name}")
 
     if isinstance(value, DTypeID):  # Check before int, because DTypeID is also an int
         if dtype == DTypeID.DTYPE:
-            return struct.pack(fmt, value)
+            return dtype_struct.pack(value)
         else:
             raise HdcDataTypeError(f"Vale of type {value.__class__} is unsuitable "
                                    f"for a property of type {dtype.name}")
@@ -96,7 +137,7 @@ def value_to_bytes(dtype: DTypeID, value: int | float | str | bytes | DTypeID) -
                      DTypeID.INT8,
                      DTypeID.INT16,
                      DTypeID.INT32):
-            return struct.pack(fmt, value)
+            return dtype_struct.pack(value)
         else:
             raise HdcDataTypeError(f"Vale of type {value.__class__} is unsuitable "
                                    f"for a property of type {dtype.name}")
@@ -104,7 +145,7 @@ def value_to_bytes(dtype: DTypeID, value: int | float | str | bytes | DTypeID) -
     if isinstance(value, float):
         if dtype in (DTypeID.FLOAT,
                      DTypeID.DOUBLE):
-            return struct.pack(fmt, value)
+            return dtype_struct.pack(value)
         else:
             raise HdcDataTypeError(f"Vale of type {value.__class__} is unsuitable "
                                    f"for a property of type {dtype.name}")
@@ -122,21 +163,21 @@ def bytes_to_value(dtype, value_as_bytes: bytes) -> int | float | str | bytes |
     if dtype == DTypeID.BLOB:
         return value_as_bytes
 
-    fmt = dtype_struct_format(dtype)
+    dtype_struct = _DTYPE_STRUCTS.get(dtype)
 
-    if fmt is None:
+    if dtype_struct is None:
         raise HdcDataTypeError(f"Don't know how to convert bytes of property type {dtype.name} "
                                f"into a python type")
 
     # Sanity check data size
-    expected_size = dtype_size(dtype)
+    expected_size = dtype_struct.size
     if len(value_as_bytes) != expected_size:
         raise HdcDataTypeError(
             f"Mismatch of data size. "
             f"Expected {expected_size} bytes, "
             f"but attempted to convert {len(value_as_bytes)}")
 
-    value_as_python_type = struct.unpack(fmt, value_as_bytes)[0]
+    value_as_python_type = dtype_struct.unpack(value_as_bytes)[0]
 
     if dtype == DTypeID.DTYPE:
         try:
@@ -148,7 +189,7 @@ def bytes_to_value(dtype, value_as_bytes: bytes) -> int | float | str | bytes |
 
 
 def parse_payload(raw_payload: bytes,
-                  expected_data_types: DTypeID | list[DTypeID] | None
+                  expected_data_types: DTypeID | typing.Sequence[DTypeID] | None
                   ) -> typing.Any:
     if expected_data_types == [None]:  # Being tolerant with weird ways of saying 'void'
         expected_data_types = None
@@ -194,18 +235,18 @@ def parse_payload(raw_payload: bytes,
 
 
 def parse_command_request_payload(request_message: bytes,
-                                  expected_data_types: DTypeID | list[DTypeID] | None) -> typing.Any:
+                                  expected_data_types: DTypeID | typing.Sequence[DTypeID] | None) -> typing.Any:
     raw_payload = request_message[3:]  # Strip 3 leading bytes: MsgID + FeatureID + CmdID
     return parse_payload(raw_payload=raw_payload, expected_data_types=expected_data_types)
 
 
 def parse_command_reply_payload(reply_message: bytes,
-                                expected_data_types: DTypeID | list[DTypeID] | None) -> typing.Any:
+                                expected_data_types: DTypeID | typing.Sequence[DTypeID] | None) -> typing.Any:
     raw_payload = reply_message[4:]  # Strip 4 leading bytes: MsgID + FeatureID + CmdID + ExcID
     return parse_payload(raw_payload=raw_payload, expected_data_types=expected_data_types)
 
 
 def parse_event_payload(event_message: bytes,
-                        expected_data_types: DTypeID | list[DTypeID] | None) -> typing.Any:
+                        expected_data_types: DTypeID | typing.Sequence[DTypeID] | None) -> typing.Any:
     raw_payload = event_message[3:]  # Strip 3 leading bytes: MsgID + FeatureID + EvtID
     return parse_payload(raw_payload=raw_payload, expected_data_types=expected_data_types)
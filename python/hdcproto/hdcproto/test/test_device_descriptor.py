@@ -2,9 +2,14 @@ import enum
 import json
 import logging
 import unittest
-
-from hdcproto.device.service import DeviceService, CoreFeatureService
-from hdcproto.spec import (MessageTypeID, FeatureID, EvtID, CmdID, PropID, ExcID, MetaID, HDC_VERSION)
+import unittest.mock
+
+import hdcproto.descriptor
+import hdcproto.device.service
+from hdcproto.descriptor import CommandDescriptor, EventDescriptor, ArgD, RetD, FeatureDescriptor, register_by_id
+from hdcproto.device.service import DeviceService, CoreFeatureService, CommandService, EventService
+from hdcproto.exception import HdcCmdException, HdcDataTypeError
+from hdcproto.spec import (MessageTypeID, FeatureID, EvtID, CmdID, PropID, ExcID, MetaID, HDC_VERSION, DTypeID)
 from hdcproto.transport.mock import MockTransport
 
 
@@ -23,6 +28,16 @@ class TestableCoreService(CoreFeatureService):
     def __init__(self, device_service: DeviceService):
         super().__init__(device_service=device_service, feature_states=self.States)
 
+        self.cmd_multiply = CommandService(
+            command_descriptor=CommandDescriptor(
+                id=0x01,
+                name="multiply",
+                args=[ArgD(DTypeID.UINT8, "a"), ArgD(DTypeID.UINT16, "b")],
+                returns=RetD(DTypeID.UINT32),
+                raises=None),
+            feature_service=self,
+            command_implementation=lambda a, b: a * b)
+
     @enum.unique
     class States(enum.IntEnum):
         OFF = 0x00
@@ -31,6 +46,55 @@ class TestableCoreService(CoreFeatureService):
         ERROR = 0xFF
 
 
+class TestDescriptorRegistries(unittest.TestCase):
+    def test_registries_are_ordered_by_id(self):
+        feature_descriptor = FeatureDescriptor(
+            id=0x01,
+            name="my_feature",
+            cls="MyFeature",
+            commands=[CommandDescriptor(id=cmd_id, name=f"cmd_{cmd_id}", args=None, returns=None, raises=None)
+                      for cmd_id in (0x05, 0x01, 0x03)])
+        register_by_id(feature_descriptor.commands,
+                       CommandDescriptor(id=0x02, name="cmd_2", args=None, returns=None, raises=None))
+        self.assertEqual([0x01, 0x02, 0x03, 0x05], list(feature_descriptor.commands.keys()))
+        self.assertEqual([0x01, 0x02, 0x03, 0x05], [d['id'] for d in feature_descriptor.to_idl_dict()['commands']])
+
+    def test_command_idl_dict_is_memoized(self):
+        command_descriptor = CommandDescriptor(id=0x01, name="my_cmd", args=None, returns=None, raises=None)
+        idl_dict = command_descriptor.to_idl_dict()
+        self.assertIs(idl_dict, command_descriptor.to_idl_dict())
+
+        command_descriptor.register_exception(HdcCmdException(id=0x01, name="MyError"))
+        self.assertEqual(["MyError"], [exc['name'] for exc in command_descriptor.to_idl_dict()['raises']])
+
+        # Replacing the raises dictionary must not leave a stale memo behind, while writing into it is prevented
+        command_descriptor.raises = {0x03: HdcCmdException(id=0x03, name="MyThirdError")}
+        self.assertEqual(["MyThirdError"], [exc['name'] for exc in command_descriptor.to_idl_dict()['raises']])
+        with self.assertRaises(TypeError):
+            command_descriptor.raises[0x02] = HdcCmdException(id=0x02, name="MyOtherError")
+
+    def test_registering_command_exception_invalidates_idl_json_cache(self):
+        my_device = TestableDeviceService()
+        self.assertNotIn(b"MyError", my_device.to_idl_json_bytes())
+        my_device.core.cmd_multiply.register_exception(HdcCmdException(id=0x01, name="MyError"))
+        self.assertIn(b"MyError", my_device.to_idl_json_bytes())
+
+
+    def test_service_descriptors_are_validated(self):
+        with self.assertRaises(TypeError):  # Once, when the subclass is defined
+            class MyCommandService(CommandService):
+                COMMAND_DESCRIPTOR = "Not a CommandDescriptor"
+        with self.assertRaises(TypeError):
+            class MyEventService(EventService):
+                EVENT_DESCRIPTOR = "Not an EventDescriptor"
+
+        my_device = TestableDeviceService()
+        with self.assertRaises(TypeError):  # Whenever not the descriptor declared by the subclass
+            CommandService(command_descriptor=None, feature_service=my_device.core, command_implementation=print)
+        with self.assertRaises(TypeError):
+            EventService(event_descriptor=None, feature_service=my_device.core)
+
+
 class TestConnection(unittest.TestCase):
     def test_connect_without_context(self):
         my_device = TestableDeviceService()
@@ -107,6 +171,36 @@ class TestMessages(unittest.TestCase):
         json.loads(idl_json)  # Test whether it's valid JSON syntax.
         # ToDo: Validate IDL-JSON produced by Python descriptors with a JSON-Schema grammar.
 
+    def test_meta_idl_json_from_str_generator(self):
+        self.my_device.router.idl_json_generator = lambda: '{"name": "Hä"}'  # Legacy generators returned a str
+        cmd_req = bytes([MessageTypeID.META, MetaID.IDL_JSON])
+        self.conn_mock.receive_message(cmd_req)
+        received_reply = self.conn_mock.outbound_messages.pop()
+        self.assertEqual(cmd_req + '{"name": "Hä"}'.encode(), received_reply)
+
+    def test_idl_json_matches_idl_dict(self):
+        device_descriptor = self.my_device.device_descriptor
+        self.assertEqual(device_descriptor.to_idl_dict(), json.loads(device_descriptor.to_idl_json()))
+        self.assertEqual(device_descriptor.to_idl_dict(), json.loads(device_descriptor.to_idl_json_bytes()))
+        with unittest.mock.patch("hdcproto.descriptor.orjson", None):  # Fallback to stdlib json
+            self.assertEqual(device_descriptor.to_idl_dict(), json.loads(device_descriptor.to_idl_json()))
+            self.assertEqual(device_descriptor.to_idl_dict(), json.loads(device_descriptor.to_idl_json_bytes()))
+            fallback_idl_json = device_descriptor.to_idl_json()
+        if hdcproto.descriptor.orjson is not None:
+            self.assertEqual(device_descriptor.to_idl_json(), fallback_idl_json)  # Both produce compact JSON
+
+    def test_idl_json_cache_invalidation(self):
+        idl_json = self.my_device.to_idl_json_bytes()
+        self.assertIs(idl_json, self.my_device.to_idl_json_bytes())  # Served from cache
+
+        CommandService(command_descriptor=CommandDescriptor(id=0x02, name="noop", args=None, returns=None,
+                                                            raises=None),
+                       feature_service=self.my_device.core,
+                       command_implementation=lambda: None)
+        idl_dict = json.loads(self.my_device.to_idl_json_bytes())  # Should have been re-generated
+        core_feature_idl = next(f for f in idl_dict['features'] if f['id'] == FeatureID.CORE)
+        self.assertIn("noop", [c['name'] for c in core_feature_idl['commands']])
+
 
 class TestCommands(unittest.TestCase):
     def setUp(self) -> None:
@@ -124,6 +218,26 @@ class TestCommands(unittest.TestCase):
                                 CmdID.GET_PROP_VALUE, ExcID.NO_ERROR, logging.WARNING])
         self.assertSequenceEqual(expected_reply, received_reply)
 
+    def test_get_property_value_reuses_encoding_of_identical_value(self):
+        self.my_device.core.log_event_threshold = logging.WARNING
+        cmd_req = bytes([MessageTypeID.COMMAND, FeatureID.CORE, CmdID.GET_PROP_VALUE, PropID.LOG_EVT_THRESHOLD])
+        reply_prefix = bytes([MessageTypeID.COMMAND, FeatureID.CORE, CmdID.GET_PROP_VALUE, ExcID.NO_ERROR])
+        with unittest.mock.patch('hdcproto.device.service.value_to_bytes',
+                                 wraps=hdcproto.device.service.value_to_bytes) as encoder_spy:
+            def count_property_encodings():  # Ignoring the BLOB of the reply
+                return sum(1 for args, _ in encoder_spy.call_args_list if args[0] == DTypeID.UINT8)
+
+            self.conn_mock.receive_message(cmd_req)
+            self.conn_mock.receive_message(cmd_req)
+            self.assertEqual(1, count_property_encodings())
+            self.assertSequenceEqual(reply_prefix + bytes([logging.WARNING]), self.conn_mock.outbound_messages.pop())
+            self.assertSequenceEqual(reply_prefix + bytes([logging.WARNING]), self.conn_mock.outbound_messages.pop())
+
+            self.my_device.core.log_event_threshold = logging.ERROR
+            self.conn_mock.receive_message(cmd_req)
+            self.assertEqual(2, count_property_encodings())
+            self.assertSequenceEqual(reply_prefix + bytes([logging.ERROR]), self.conn_mock.outbound_messages.pop())
+
     def test_set_property_value(self):
         self.my_device.core.log_event_threshold = logging.WARNING
         cmd_req = bytes([MessageTypeID.COMMAND, FeatureID.CORE,
@@ -135,6 +249,54 @@ class TestCommands(unittest.TestCase):
         self.assertSequenceEqual(expected_reply, received_reply)
         self.assertEqual(self.my_device.core.log_event_threshold, logging.INFO)
 
+    def test_get_unknown_property_value(self):
+        cmd_req = bytes([MessageTypeID.COMMAND, FeatureID.CORE, CmdID.GET_PROP_VALUE, 0x42])  # Unknown PropertyID
+        self.conn_mock.receive_message(cmd_req)
+        received_reply = self.conn_mock.outbound_messages.pop()
+        expected_reply = bytes([MessageTypeID.COMMAND, FeatureID.CORE, CmdID.GET_PROP_VALUE, ExcID.UnknownProperty])
+        self.assertSequenceEqual(expected_reply, received_reply[:4])
+
+    def test_fixed_size_command(self):
+        cmd_req = bytes([MessageTypeID.COMMAND, FeatureID.CORE, 0x01, 200]) + (1000).to_bytes(2, 'little')
+        self.conn_mock.receive_message(cmd_req)
+        received_reply = self.conn_mock.outbound_messages.pop()
+        expected_reply = bytes([MessageTypeID.COMMAND, FeatureID.CORE, 0x01, ExcID.NO_ERROR])
+        expected_reply += (200 * 1000).to_bytes(4, 'little')
+        self.assertSequenceEqual(expected_reply, received_reply)
+
+    def test_fixed_size_command_with_missing_arguments(self):
+        cmd_req = bytes([MessageTypeID.COMMAND, FeatureID.CORE, 0x01, 200])  # Omitting second argument!
+        self.conn_mock.receive_message(cmd_req)
+        received_reply = self.conn_mock.outbound_messages.pop()
+        expected_reply = bytes([MessageTypeID.COMMAND, FeatureID.CORE, 0x01, ExcID.InvalidArgs])
+        self.assertSequenceEqual(expected_reply, received_reply[:4])
+
+    def test_fixed_size_command_error_messages(self):
+        for payload, expected_exc_text in ((bytes([200]), "Payload is shorter than expected."),
+                                           (bytes([200, 0xE8, 0x03, 0x42]), "Payload is longer than expected.")):
+            with self.subTest(payload=payload):
+                self.conn_mock.receive_message(bytes([MessageTypeID.COMMAND, FeatureID.CORE, 0x01]) + payload)
+                received_reply = self.conn_mock.outbound_messages.pop()
+                self.assertEqual(ExcID.InvalidArgs, received_reply[3])
+                self.assertEqual(expected_exc_text, received_reply[4:].decode())
+
+    def test_command_rejects_unsuitable_return_types(self):
+        for dtype, unsuitable_value in ((DTypeID.BOOL, "abc"),
+                                        (DTypeID.BOOL, 5),
+                                        (DTypeID.FLOAT, 1),
+                                        (DTypeID.UINT8, True),
+                                        (DTypeID.DTYPE, 1)):
+            with self.subTest(dtype=dtype, value=unsuitable_value):
+                my_device = TestableDeviceService()
+                my_device.connect()
+                CommandService(command_descriptor=CommandDescriptor(id=0x02, name="my_cmd", args=None,
+                                                                    returns=RetD(dtype), raises=None),
+                               feature_service=my_device.core,
+                               command_implementation=lambda: unsuitable_value)
+                with self.assertRaises(HdcDataTypeError):
+                    my_device.router.transport.receive_message(bytes([MessageTypeID.COMMAND, FeatureID.CORE, 0x02]))
+                self.assertFalse(my_device.router.transport.outbound_messages)
+
 
 class TestExceptionsDefinedByHdc(unittest.TestCase):
     def setUp(self) -> None:
@@ -209,6 +371,7 @@ class TestCommandErrors(unittest.TestCase):
                                 ExcID.InvalidArgs])
 
         self.assertSequenceEqual(expected_reply, received_reply[:4])
+        self.assertEqual("Payload is shorter than expected.", received_reply[4:].decode())
 
     def test_excess_command_arguments(self):
         unexpected_argument = 0x42
@@ -220,6 +383,17 @@ class TestCommandErrors(unittest.TestCase):
                                 ExcID.InvalidArgs])
 
         self.assertSequenceEqual(expected_reply, received_reply[:4])
+        self.assertEqual("Payload is longer than expected.", received_reply[4:].decode())
+
+    def test_missing_set_property_value_arguments(self):
+        cmd_req = bytes([MessageTypeID.COMMAND, FeatureID.CORE, CmdID.SET_PROP_VALUE])  # Omitting PropID argument!
+        self.conn_mock.receive_message(cmd_req)
+        received_reply = self.conn_mock.outbound_messages.pop()
+        expected_reply = bytes([MessageTypeID.COMMAND, FeatureID.CORE, CmdID.SET_PROP_VALUE,
+                                ExcID.InvalidArgs])
+
+        self.assertSequenceEqual(expected_reply, received_reply[:4])
+        self.assertEqual("Payload is shorter than expected.", received_reply[4:].decode())
 
 
 class TestEvents(unittest.TestCase):
@@ -243,6 +417,20 @@ class TestEvents(unittest.TestCase):
         self.my_device.core.hdc_logger.info(log_text)  # <--- INFO is less than WARNING
         self.assertFalse(self.conn_mock.outbound_messages)  # Should suppress it
 
+    def test_log_event_threshold_set_via_hdc(self):
+        self.my_device.core.hdc_logger.setLevel(logging.DEBUG)  # Otherwise inherits WARNING from the root logger
+        self.my_device.core.log_event_threshold = logging.WARNING
+        cmd_req = bytes([MessageTypeID.COMMAND, FeatureID.CORE,
+                         CmdID.SET_PROP_VALUE, PropID.LOG_EVT_THRESHOLD, logging.INFO])
+        self.conn_mock.receive_message(cmd_req)
+        self.conn_mock.outbound_messages.pop()  # Discard reply
+        log_text = "This is an info"
+        self.my_device.core.hdc_logger.info(log_text)  # Not suppressed anymore
+        sent_msg = self.conn_mock.outbound_messages.pop()
+        expected_msg = bytes([MessageTypeID.EVENT, FeatureID.CORE, EvtID.LOG,
+                              logging.INFO]) + log_text.encode(encoding='utf-8')
+        self.assertEqual(expected_msg, sent_msg)
+
     def test_feature_state_transition_event(self):
         previous_state_id = self.my_device.core._current_state_id
         new_feature_state_id = TestableCoreService.States.READY  # Arbitrary
@@ -251,3 +439,114 @@ class TestEvents(unittest.TestCase):
         expected_msg = bytes([MessageTypeID.EVENT, FeatureID.CORE, EvtID.FEATURE_STATE_TRANSITION,
                               previous_state_id, new_feature_state_id])
         self.assertEqual(expected_msg, sent_msg)
+
+    def test_feature_state_transition_event_checks_plain_ints_inline(self):
+        evt_service = self.my_device.core._evt_state_transition
+        with unittest.mock.patch("hdcproto.device.service.validate_uint8") as validate_spy:
+            evt_service.emit(previous_state_id=0x00, current_state_id=0xFF)
+        validate_spy.assert_not_called()
+        sent_msg = self.conn_mock.outbound_messages.pop()
+        self.assertEqual(bytes([MessageTypeID.EVENT, FeatureID.CORE, EvtID.FEATURE_STATE_TRANSITION, 0x00, 0xFF]),
+                         sent_msg)
+
+    def test_feature_state_transition_event_validates_each_state_id(self):
+        evt_service = self.my_device.core._evt_state_transition
+        with self.assertRaisesRegex(ValueError, "Value -1 is beyond valid range"):
+            evt_service.emit(previous_state_id=0x01, current_state_id=-1)
+        with self.assertRaisesRegex(ValueError, "Value 256 is beyond valid range"):
+            evt_service.emit(previous_state_id=0x100, current_state_id=0x01)
+        with self.assertRaisesRegex(TypeError, "Expected int, but got str"):
+            evt_service.emit(previous_state_id="1", current_state_id=0x01)
+        with self.assertRaises(HdcDataTypeError):
+            evt_service.emit(previous_state_id=True, current_state_id=0x01)
+        self.assertFalse(self.conn_mock.outbound_messages)
+
+    def test_fixed_size_event(self):
+        evt_service = EventService(event_descriptor=EventDescriptor(id=0x01, name="my_evt",
+                                                                    args=[ArgD(DTypeID.UINT8, "a"),
+                                                                          ArgD(DTypeID.UINT16, "b")],
+                                                                    doc=None),
+                                   feature_service=self.my_device.core)
+        evt_service.emit(0x12, b=0x3456)
+        sent_msg = self.conn_mock.outbound_messages.pop()
+        self.assertEqual(bytes([MessageTypeID.EVENT, FeatureID.CORE, 0x01, 0x12, 0x56, 0x34]), sent_msg)
+
+        with self.assertRaises(HdcDataTypeError):
+            evt_service.emit(a=0x100, b=0x01)
+        self.assertFalse(self.conn_mock.outbound_messages)
+
+    def test_event_rejects_unsuitable_argument_types(self):
+        for dtype, unsuitable_value in ((DTypeID.BOOL, "abc"),
+                                        (DTypeID.BOOL, 5),
+                                        (DTypeID.FLOAT, 1),
+                                        (DTypeID.UINT8, True),
+                                        (DTypeID.DTYPE, 1)):
+            with self.subTest(dtype=dtype, value=unsuitable_value):
+                evt_service = EventService(event_descriptor=EventDescriptor(id=0x01, name="my_evt",
+                                                                            args=[ArgD(dtype, "a")],
+                                                                            doc=None),
+                                           feature_service=self.my_device.core)
+                with self.assertRaises(HdcDataTypeError):
+                    evt_service.emit(unsuitable_value)
+                self.assertFalse(self.conn_mock.outbound_messages)
+
+    def test_variable_size_tail_event(self):
+        evt_service = EventService(event_descriptor=EventDescriptor(id=0x01, name="my_evt",
+                                                                    args=[ArgD(DTypeID.UINT16, "a"),
+                                                                          ArgD(DTypeID.UTF8, "b")],
+                                                                    doc=None),
+                                   feature_service=self.my_device.core)
+        evt_service.emit(0x1234, b="Hä")
+        sent_msg = self.conn_mock.outbound_messages.pop()
+        self.assertEqual(bytes([MessageTypeID.EVENT, FeatureID.CORE, 0x01, 0x34, 0x12]) + "Hä".encode(), sent_msg)
+
+        with self.assertRaises(HdcDataTypeError):
+            evt_service.emit(0x1234, b=b"Not a str")
+        self.assertFalse(self.conn_mock.outbound_messages)
+
+        for unsuitable_value in (True, 1.0):  # The fixed-size head is type-checked, too
+            with self.subTest(value=unsuitable_value):
+                with self.assertRaises(HdcDataTypeError):
+                    evt_service.emit(unsuitable_value, b="Hä")
+                self.assertFalse(self.conn_mock.outbound_messages)
+
+    def test_variable_size_tail_reply_rejects_unsuitable_head_types(self):
+        for unsuitable_value in (True, 1.0):
+            with self.subTest(value=unsuitable_value):
+                my_device = TestableDeviceService()
+                my_device.connect()
+                CommandService(command_descriptor=CommandDescriptor(id=0x02, name="my_cmd", args=None,
+                                                                    returns=[RetD(DTypeID.UINT16, "a"),
+                                                                             RetD(DTypeID.UTF8, "b")],
+                                                                    raises=None),
+                               feature_service=my_device.core,
+                               command_implementation=lambda: (unsuitable_value, "Hä"))
+                with self.assertRaises(HdcDataTypeError):
+                    my_device.router.transport.receive_message(bytes([MessageTypeID.COMMAND, FeatureID.CORE, 0x02]))
+                self.assertFalse(my_device.router.transport.outbound_messages)
+
+    def test_log_event_threshold_applies_to_further_hdc_logging_handlers(self):
+        app_logger = logging.getLogger("test_app_logger")
+        app_logger.setLevel(logging.DEBUG)
+        app_logger.propagate = False
+        app_handler = hdcproto.device.service.HdcLoggingHandler(log_event_service=self.my_device.core._evt_log)
+        app_logger.addHandler(app_handler)
+        try:
+            self.assertEqual(logging.WARNING, app_handler.level)
+            self.my_device.core.log_event_threshold = logging.INFO
+            self.assertEqual(logging.INFO, app_handler.level)
+            app_logger.info("This is an info")
+            sent_msg = self.conn_mock.outbound_messages.pop()
+            self.assertEqual(bytes([MessageTypeID.EVENT, FeatureID.CORE, EvtID.LOG, logging.INFO]) + b"This is an info",
+                             sent_msg)
+        finally:
+            app_logger.removeHandler(app_handler)
+
+    def test_log_event_suppression_skips_formatting(self):
+        self.my_device.core.log_event_threshold = logging.WARNING
+        self.my_device.core.hdc_logger.setLevel(logging.DEBUG)  # Let the record reach the HdcLoggingHandler
+        hdc_handler = self.my_device.core.hdc_logger.handlers[0]
+        with unittest.mock.patch.object(hdc_handler, 'format', wraps=hdc_handler.format) as format_spy:
+            self.my_device.core.hdc_logger.info("This is an info")
+        self.assertFalse(self.conn_mock.outbound_messages)  # Should suppress it...
+        format_spy.assert_not_called()  # ... without even formatting it
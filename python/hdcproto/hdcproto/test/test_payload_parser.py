@@ -2,7 +2,7 @@ import typing
 import unittest
 
 from hdcproto.exception import HdcDataTypeError
-from hdcproto.parse import value_to_bytes, parse_payload
+from hdcproto.parse import value_to_bytes, parse_payload, dtypes_struct
 from hdcproto.spec import DTypeID
 
 
@@ -338,5 +338,34 @@ class TestPayloadParser(unittest.TestCase):
             parse_payload(raw_payload=payload, expected_data_types=expected_data_types)
 
 
+class TestDTypesStruct(unittest.TestCase):
+
+    def test_struct_is_equivalent_to_value_to_bytes(self):
+        types_and_values: list[tuple[DTypeID, typing.Any]] = [
+            (DTypeID.BOOL, True),
+            (DTypeID.UINT8, 0x42),
+            (DTypeID.UINT16, 0x4243),
+            (DTypeID.INT32, -123456),
+            (DTypeID.FLOAT, 0.5),
+            (DTypeID.DOUBLE, -1.25),
+        ]
+        st = dtypes_struct(dtype for dtype, _ in types_and_values)
+        expected_payload = b"".join(value_to_bytes(dtype, value) for dtype, value in types_and_values)
+        self.assertEqual(expected_payload, st.pack(*(value for _, value in types_and_values)))
+        self.assertEqual(tuple(value for _, value in types_and_values), st.unpack(expected_payload))
+
+    def test_no_struct_for_variable_size(self):
+        self.assertIsNone(dtypes_struct([DTypeID.UINT8, DTypeID.UTF8]))
+        self.assertIsNone(dtypes_struct([DTypeID.BLOB]))
+
+    def test_empty_struct_for_void(self):
+        self.assertEqual(dtypes_struct([]).size, 0)
+
+    def test_struct_with_prefix(self):
+        st = dtypes_struct([DTypeID.UINT8, DTypeID.UINT16], prefix_size=3)
+        self.assertEqual(b"\x01\x02\x03" + b"\x04" + b"\x05\x06", st.pack(b"\x01\x02\x03", 0x04, 0x0605))
+        self.assertIsNone(dtypes_struct([DTypeID.UTF8], prefix_size=3))
+
+
 if __name__ == '__main__':
     unittest.main()
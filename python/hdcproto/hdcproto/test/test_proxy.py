@@ -3,7 +3,7 @@ from __future__ import annotations
 import unittest
 
 from hdcproto.descriptor import FeatureDescriptor
-from hdcproto.exception import HdcCmdException, HdcCmdExc_UnknownProperty
+from hdcproto.exception import HdcCmdException, HdcCmdExc_UnknownProperty, HdcCmdExc_NotNow, HdcDataTypeError
 from hdcproto.host.proxy import (DeviceProxyBase, FeatureProxyBase, )
 from hdcproto.spec import (ExcID, MessageTypeID, MetaID, PropID, FeatureID, CmdID)
 from hdcproto.transport.mock import MockTransport
@@ -159,6 +159,14 @@ class TestExceptionConstructor(unittest.TestCase):
             HdcCmdException(id=256,
                             name="")
 
+    def test_reserved_exception(self):
+        exc = HdcCmdExc_NotNow("This is a text message.")
+        self.assertEqual(exc.exception_id, ExcID.NotNow)
+        self.assertIs(type(exc.exception_id), int)
+        self.assertEqual(exc.exception_name, "NotNow")
+        self.assertEqual(exc.exception_doc, "Command can't be executed at this moment.")
+        self.assertEqual(exc.exception_message, "This is a text message.")
+
 
 class TestExceptionCloning(unittest.TestCase):
 
@@ -199,6 +207,29 @@ class TestExceptionCloning(unittest.TestCase):
         self.assertEqual(exc_clone.exception_name, exc_descriptor.exception_name)
         self.assertEqual(exc_clone.exception_message, exception_text)
 
+    def test_cloning_without_exception_text(self):
+        exc_descriptor = HdcCmdExc_NotNow()
+        mocked_hdc_error_msg = bytes([MessageTypeID.COMMAND, FeatureID.CORE, CmdID.GET_PROP_VALUE, ExcID.NotNow])
+
+        exc_clone = exc_descriptor.clone_with_hdc_message(mocked_hdc_error_msg)
+
+        self.assertIsInstance(exc_clone, HdcCmdExc_NotNow)
+        self.assertEqual(exc_clone.exception_message, "")
+
+        with self.assertRaises(HdcDataTypeError):
+            exc_descriptor.clone_with_hdc_message(mocked_hdc_error_msg[:3])  # Lacking the ExcID
+
+    def test_proxy_factory_specializes_reserved_exceptions(self):
+        exc_descriptor = HdcCmdException.from_idl_dict(dict(id=ExcID.NotNow, name="NotNow"))
+        exc_proxy = DeviceProxyBase.proxy_factory(exc_descriptor, parent_proxy=None, custom_proxy_factory=None)
+        self.assertIsInstance(exc_proxy, HdcCmdExc_NotNow)
+        # Each proxy gets its own instance, because applications may modify or even raise it
+        self.assertIsNot(exc_proxy, DeviceProxyBase.proxy_factory(exc_descriptor, None, custom_proxy_factory=None))
+
+        custom_exc_descriptor = HdcCmdException(id=0xDD, name="MyName")
+        exc_proxy = DeviceProxyBase.proxy_factory(custom_exc_descriptor, parent_proxy=None, custom_proxy_factory=None)
+        self.assertIs(exc_proxy, custom_exc_descriptor)
+
 
 class TestExceptionHandling(unittest.TestCase):
     def setUp(self) -> None:
@@ -244,7 +275,7 @@ class TestExceptionHandling(unittest.TestCase):
 
         # Inject custom exception instance as a descriptor into the command_descriptor
         custom_exception = MyCustomException()
-        self.some_command_proxy.command_descriptor.raises[custom_exception.exception_id] = custom_exception
+        self.some_command_proxy.command_descriptor.register_exception(custom_exception)
 
         def reply_mocking(req: bytes) -> bytes | None:
             if req[:3] == self.some_command_proxy.msg_prefix:
@@ -65,8 +65,7 @@ class TestBasicScenario(unittest.TestCase):
 
             # Can deal with dynamically registered custom exception
             custom_exception = MyDivZeroError()  # Exception objects also serve as descriptors
-            dynamic_proxy.core.cmd_division. \
-                command_descriptor.raises[custom_exception.exception_id] = custom_exception
+            dynamic_proxy.core.cmd_division.command_descriptor.register_exception(custom_exception)
             with self.assertRaises(MyDivZeroError):
                 dynamic_proxy.core.cmd_division(numerator=10.0, denominator=0.0)
 
@@ -150,8 +149,7 @@ class TestTunneling(unittest.TestCase):
 
                 # Can deal with dynamically registered custom exception
                 custom_exception = MyDivZeroError()  # Exception objects also serve as descriptors
-                subdevice_proxy.core.cmd_division. \
-                    command_descriptor.raises[custom_exception.exception_id] = custom_exception
+                subdevice_proxy.core.cmd_division.command_descriptor.register_exception(custom_exception)
                 with self.assertRaises(MyDivZeroError):
                     subdevice_proxy.core.cmd_division(numerator=10.0, denominator=0.0)
 
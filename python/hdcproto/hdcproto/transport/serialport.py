@@ -79,9 +79,8 @@ class SerialTransport(TransportBase):
             return self._serial_port.write(data)
 
     def send_message(self, message: bytes) -> None:
-        with self._writing_lock:
-            for packet in self._packetizer.pack_message(message):
-                self.write(packet)  # ToDo: Maybe we should concatenate all packets and just call this once?
+        # Concatenating all packets of this message, to be handed to the OS with a single write-call
+        self.write(b"".join(self._packetizer.pack_message(message)))
 
     def flush(self) -> None:
         if not self.is_connected:
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import re
 
 import semver
@@ -99,11 +100,17 @@ def validate_mandatory_version(version_to_check: semver.VersionInfo | str) -> se
         return version_to_check
 
     if isinstance(version_to_check, str):
-        return semver.VersionInfo.parse(version_to_check)
+        return _parse_version(version_to_check)
 
     raise TypeError(f"Expected VersionInfo or str, but got {version_to_check.__class__.__name__}")
 
 
+@functools.lru_cache(maxsize=256)
+def _parse_version(version_str: str) -> semver.VersionInfo:
+    """Memoized, because it's a regex-match and the same few versions get parsed over and over again."""
+    return semver.VersionInfo.parse(version_str)  # Raises ValueError, which is not cached
+
+
 def validate_optional_version(version_to_check: semver.VersionInfo | str | None) -> semver.VersionInfo | None:
     if version_to_check is None:
         return None